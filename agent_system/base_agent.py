@@ -1,6 +1,6 @@
 import google.generativeai as genai
 from google.generativeai.types import FunctionDeclaration, Tool
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from .models import AgentContext
 from .registry import AgentRegistry
 from .mcp_client import SimpleMCPClient
@@ -13,13 +13,63 @@ import time
 import hashlib
 import json
 import ast
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 load_dotenv()
 genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
 
 _model_cache = {}
-_model_cache_lock = __import__('threading').Lock()
+_model_cache_lock = threading.Lock()
+
+_SCRATCHPAD_RE = re.compile(r"\[\[scratch\]\](.*?)\[\[/scratch\]\]", re.DOTALL)
+_HORIZONTAL_RULE_RE = re.compile(r"\n\s*---\s*\n")
+
+# Guardrail is internal safety check - never stream to client
+_CLIENT_STREAM_AGENTS = frozenset({
+    "Critic", "Conversation Planner", "Physician", "Nutritionist",
+    "Fitness Coach", "Sleep Doctor", "Mindfulness Coach",
+})
+# Only the Critic writes the user-facing reply; other agents' narration stays
+# on the console. The finalized reply (plan sections enforced, scratchpad and
+# rules stripped) is still sent separately and supersedes the streamed draft.
+_CLIENT_TEXT_EVENT_AGENTS = frozenset({"Critic"})
+# Mental health crisis keywords
+_MENTAL_HEALTH_MARKERS = ("suicid", "kill myself", "end my life", "self-harm", "hurt myself", "don't want to live")
+_MENTAL_HEALTH_RE = re.compile("|".join(re.escape(kw) for kw in _MENTAL_HEALTH_MARKERS), re.IGNORECASE)
+
+# Critic plan sections: keywords are stored lowercased to match against lowered text
+_PLAN_SECTIONS = {
+    "nutrition": {
+        "keywords": ("nutrition plan", "diet plan"),
+        "fallback": "### Nutrition Plan\nFocus on whole foods, ample soluble fiber (oats, beans, berries), lean proteins, and omega-3 rich fish at least 2x/week while limiting saturated fats and refined sugars to improve LDL, ApoB, and triglycerides."
+    },
+    "fitness": {
+        "keywords": ("fitness plan", "exercise plan", "workout plan"),
+        "fallback": "### Fitness Plan\nTarget 150 minutes/week of moderate cardio (brisk walking, cycling, swimming) plus 2 strength sessions covering all major muscle groups. Progress duration by 5 minutes each week as tolerated."
+    },
+    "sleep": {
+        "keywords": ("sleep plan", "sleep optimization"),
+        "fallback": "### Sleep Plan\nHold a consistent 10:30 PM bedtime / 6:30 AM wake schedule, keep the bedroom dark/cool (65-68°F), and shut down screens 60 minutes before bed to support hormone balance and recovery."
+    },
+    "mindfulness": {
+        "keywords": ("mindfulness plan", "stress management"),
+        "fallback": "### Stress Management Plan\nUse 4-7-8 breathing during stressful moments, a 2-minute midday body scan, and a 10-minute guided meditation nightly. Schedule one nature walk and one joyful hobby session weekly."
+    },
+}
+
+# Widgets the Critic must attach for each flagged plan domain
+_REQUIRED_WIDGETS = {
+    "nutrition": ("return_meal_plan_widget", {"plan_type": "cholesterol"}, "Meal plan"),
+    "fitness": ("return_workout_widget", {"goal": "Cardio"}, "Workout plan"),
+    "supplements": ("return_supplement_widget", {"supplement_names": ["Vitamin D3"]}, "Supplements — Thorne"),
+}
+
+# Receives (event_type, payload) pairs for the client: ("agent", name) and ("stream", text)
+EventCallback = Callable[[str, Any], None]
+
+def _is_aborted(abort_event: Optional[threading.Event]) -> bool:
+    return abort_event is not None and abort_event.is_set()
 
 class Agent:
     def __init__(
@@ -55,12 +105,15 @@ class Agent:
         self.model_name = "gemini-2.5-flash"
 
     def _should_stream_to_client(self) -> bool:
-        # Guardrail is internal safety check - never stream to client
-        return self.name in {"Critic", "Conversation Planner", "Physician", "Nutritionist", "Fitness Coach", "Sleep Doctor", "Mindfulness Coach"}
+        return self.name in _CLIENT_STREAM_AGENTS
 
-    def _write_text_chunk(self, text: str, newline: bool = False, prefix: bool = True):
+    def _write_text_chunk(self, text: str, newline: bool = False, prefix: bool = True,
+                          on_event: Optional[EventCallback] = None):
+        """Echo model text to the console and, for the Critic, forward it to on_event."""
         is_client_stream = self._should_stream_to_client()
-        target = sys.stdout if is_client_stream else sys.__stdout__
+        if on_event is not None and text and self.name in _CLIENT_TEXT_EVENT_AGENTS:
+            on_event("stream", text)
+        target = sys.stdout
         if prefix:
             indicator = "  📤 " if is_client_stream else "  🔒 "
             target.write(indicator)
@@ -210,7 +263,7 @@ class Agent:
         def repl(match):
             scratch_segments.append(match.group(1).strip())
             return ""
-        visible_text = re.sub(r"\[\[scratch\]\](.*?)\[\[/scratch\]\]", repl, text, flags=re.DOTALL)
+        visible_text = _SCRATCHPAD_RE.sub(repl, text)
         return visible_text.strip(), scratch_segments
 
     def _get_model_cache_key(self, system_prompt: str, tools: list) -> str:
@@ -229,9 +282,26 @@ class Agent:
             _model_cache[cache_key] = model
             return model, False
     
-    def run(self, context: AgentContext) -> List[str]:
+    def run(self, context: AgentContext, abort_event: Optional[threading.Event] = None,
+            on_event: Optional[EventCallback] = None) -> List[str]:
+        """
+        Run one turn of this agent and return the names of the next agents.
+        
+        abort_event lets the orchestrator call off a run: it is checked before
+        the LLM call, between streamed chunks and before any follow-up call,
+        and an aborted run returns [] from the next checkpoint. Only an abort
+        seen before the run starts leaves context untouched; later ones may
+        leave the run's start trace and any tool results, findings or handoff
+        traces already recorded in earlier steps.
+        on_event, when given, receives ("agent", name) as the run starts and,
+        for the Critic, ("stream", text) for each chunk of its draft reply.
+        """
+        if _is_aborted(abort_event):
+            return []
         agent_start = time.time()
         print(f"\n--- Agent Active: {self.name} ---")
+        if on_event is not None:
+            on_event("agent", self.name)
         context.add_trace(f"{self.name}: started run (hop {context.hop_count})")
         
         mcp_tools = self._filter_mcp_tools(self.mcp_client.get_tools_definitions())
@@ -269,12 +339,14 @@ class Agent:
         try:
             response_stream = chat.send_message("Proceed with your task based on the context.", stream=True)
             for chunk in response_stream:
+                if _is_aborted(abort_event):
+                    break
                 chunks.append(chunk)
                 try:
                     if chunk.text:
                         has_text = True
                         streamed_text = True
-                        self._write_text_chunk(chunk.text)
+                        self._write_text_chunk(chunk.text, on_event=on_event)
                         full_text += chunk.text
                 except ValueError:
                     pass
@@ -290,7 +362,7 @@ class Agent:
             if full_text:
                 has_text = True
                 streamed_text = True
-                self._write_text_chunk(full_text, newline=True)
+                self._write_text_chunk(full_text, newline=True, on_event=on_event)
         else:
             if streamed_text:
                 self._write_text_chunk("", newline=True, prefix=False)
@@ -301,6 +373,10 @@ class Agent:
         llm_time = time.time() - llm_start
         print(f"  ⏱️  LLM Response: {llm_time:.2f}s")
         
+        if _is_aborted(abort_event):
+            print(f"  ✋ {self.name} run aborted")
+            return []
+        
         if not chunks:
             return self._get_completion_targets()
         
@@ -364,7 +440,7 @@ class Agent:
                 
                 # Generate user-friendly emergency message based on type
                 stop_text = self._get_emergency_message(reason)
-                self._write_text_chunk(stop_text, newline=True)
+                self._write_text_chunk(stop_text, newline=True, on_event=on_event)
                 print(f"  🛑 Emergency stop triggered: {reason}")
                 context.add_message("model", stop_text, sender=self.name)
                 return ["STOP"]
@@ -482,8 +558,10 @@ class Agent:
                             )
                         )
                 
+                if _is_aborted(abort_event):
+                    return []
                 tool_response = chat.send_message(genai.protos.Content(parts=response_parts))
-                return self._process_response(tool_response, context, chat)
+                return self._process_response(tool_response, context, chat, abort_event, on_event)
                     
             except Exception as e:
                 print(f"  > Tool Execution Error: {e}")
@@ -503,7 +581,10 @@ class Agent:
         print(f"  ⏱️  Total Agent Time: {agent_total:.2f}s")
         return self._get_completion_targets()
 
-    def _process_response(self, response, context, chat):
+    def _process_response(self, response, context, chat, abort_event: Optional[threading.Event] = None,
+                          on_event: Optional[EventCallback] = None):
+        if _is_aborted(abort_event):
+            return []
         mcp_tool_calls = []
         
         for part in response.parts:
@@ -644,12 +725,14 @@ class Agent:
                         )
                     )
             
+            if _is_aborted(abort_event):
+                return []
             tool_response = chat.send_message(genai.protos.Content(parts=response_parts))
-            return self._process_response(tool_response, context, chat)
+            return self._process_response(tool_response, context, chat, abort_event, on_event)
         
         text_content = self._extract_text_from_parts(response)
         if text_content:
-            self._write_text_chunk(text_content, newline=True)
+            self._write_text_chunk(text_content, newline=True, on_event=on_event)
             context.add_message("model", text_content, sender=self.name)
             if self.widgets:
                 context.pending_widgets.extend(self.widgets)
@@ -663,11 +746,7 @@ class Agent:
 
     def _get_emergency_message(self, reason: str) -> str:
         """Generate a user-friendly emergency message based on the type of crisis."""
-        reason_lower = reason.lower()
-        
-        # Mental health crisis keywords
-        mental_health_keywords = ["suicid", "kill myself", "end my life", "self-harm", "hurt myself", "don't want to live"]
-        is_mental_health = any(kw in reason_lower for kw in mental_health_keywords)
+        is_mental_health = _MENTAL_HEALTH_RE.search(reason) is not None
         
         if is_mental_health:
             return """### We're Here for You 💙
@@ -725,7 +804,7 @@ Based on what you've described, you may need immediate medical attention.
             return
         text, scratch = self._strip_scratchpad(text)
         text = self._enforce_plan_sections(text, context)
-        text = re.sub(r"\n\s*---\s*\n", "\n\n", text)
+        text = _HORIZONTAL_RULE_RE.sub("\n\n", text)
         for segment in scratch:
             context.add_trace(f"{self.name} scratch: {segment}")
         context.add_message("model", text, sender=self.name)
@@ -737,45 +816,22 @@ Based on what you've described, you may need immediate medical attention.
     def _enforce_plan_sections(self, text: str, context: AgentContext) -> str:
         if self.name != "Critic":
             return text
-        sections = {
-            "nutrition": {
-                "keywords": ["Nutrition Plan", "Diet Plan"],
-                "fallback": "### Nutrition Plan\nFocus on whole foods, ample soluble fiber (oats, beans, berries), lean proteins, and omega-3 rich fish at least 2x/week while limiting saturated fats and refined sugars to improve LDL, ApoB, and triglycerides."
-            },
-            "fitness": {
-                "keywords": ["Fitness Plan", "Exercise Plan", "Workout Plan"],
-                "fallback": "### Fitness Plan\nTarget 150 minutes/week of moderate cardio (brisk walking, cycling, swimming) plus 2 strength sessions covering all major muscle groups. Progress duration by 5 minutes each week as tolerated."
-            },
-            "sleep": {
-                "keywords": ["Sleep Plan", "Sleep Optimization"],
-                "fallback": "### Sleep Plan\nHold a consistent 10:30 PM bedtime / 6:30 AM wake schedule, keep the bedroom dark/cool (65-68°F), and shut down screens 60 minutes before bed to support hormone balance and recovery."
-            },
-            "mindfulness": {
-                "keywords": ["Mindfulness Plan", "Stress Management"],
-                "fallback": "### Stress Management Plan\nUse 4-7-8 breathing during stressful moments, a 2-minute midday body scan, and a 10-minute guided meditation nightly. Schedule one nature walk and one joyful hobby session weekly."
-            },
-        }
         lower_text = text.lower()
-        for domain, cfg in sections.items():
+        for domain, cfg in _PLAN_SECTIONS.items():
             if context.plan_domain_flags.get(domain):
-                if not any(keyword.lower() in lower_text for keyword in cfg["keywords"]):
+                if not any(keyword in lower_text for keyword in cfg["keywords"]):
                     text += "\n\n" + cfg["fallback"]
-                    lower_text = text.lower()
+                    lower_text += "\n\n" + cfg["fallback"].lower()
         return text
 
     def _ensure_required_widgets(self, context: AgentContext):
         if self.name != "Critic" or not self.widget_toolset:
             return
-        required = {
-            "nutrition": ("return_meal_plan_widget", {"plan_type": "cholesterol"}, "Meal plan"),
-            "fitness": ("return_workout_widget", {"goal": "Cardio"}, "Workout plan"),
-            "supplements": ("return_supplement_widget", {"supplement_names": ["Vitamin D3"]}, "Supplements — Thorne"),
-        }
         needs_supplement = context.plan_domain_flags.get("supplements") or any("vitamin d" in finding.lower() for finding in context.accumulated_findings)
         if needs_supplement:
             context.plan_domain_flags["supplements"] = True
         existing_types = {w.get("type") for w in context.pending_widgets}
-        for domain, (tool_name, args, widget_type) in required.items():
+        for domain, (tool_name, args, widget_type) in _REQUIRED_WIDGETS.items():
             if context.plan_domain_flags.get(domain) and widget_type not in existing_types:
                 self._handle_widget_tool(tool_name, args, context)
                 existing_types.add(widget_type)
@@ -41,7 +41,7 @@ import threading
 import atexit
 from contextlib import AsyncExitStack
 import time
-import hashlib
+import itertools
 
 class SimpleMCPClient:
     def __init__(self):
@@ -58,6 +58,8 @@ class SimpleMCPClient:
         self._cache = {}  # cache_key -> (result, timestamp)
         self._cache_lock = threading.Lock()
         self._cache_ttl = 3600  # 1 hour for reference data
+        self._cache_ttl_ns = self._cache_ttl * 1_000_000_000
+        self._cache_puts = 0
         
         # Define which tools return static data that can be cached
         self._cacheable_tools = {
@@ -88,16 +90,15 @@ class SimpleMCPClient:
         """Generate a cache key from tool name and arguments."""
         # Sort arguments for consistent hashing
         args_str = json.dumps(arguments, sort_keys=True)
-        key_str = f"{tool_name}:{args_str}"
-        return hashlib.md5(key_str.encode()).hexdigest()
+        return f"{tool_name}:{args_str}"
     
     def _get_from_cache(self, cache_key: str) -> tuple:
         """Get result from cache if valid. Returns (result, hit) tuple."""
         with self._cache_lock:
             if cache_key in self._cache:
                 result, timestamp = self._cache[cache_key]
-                age = time.time() - timestamp
-                if age < self._cache_ttl:
+                age = time.monotonic_ns() - timestamp
+                if age < self._cache_ttl_ns:
                     return result, True
                 else:
                     # Expired, remove it
@@ -106,8 +107,19 @@ class SimpleMCPClient:
     
     def _put_in_cache(self, cache_key: str, result: str):
         """Store result in cache with current timestamp."""
+        now = time.monotonic_ns()
         with self._cache_lock:
-            self._cache[cache_key] = (result, time.time())
+            self._cache[cache_key] = (result, now)
+            self._cache_puts += 1
+            if self._cache_puts % 64 == 0:
+                # Bounded sweep of the oldest entries so expired results that are
+                # never requested again don't accumulate
+                expired = [
+                    key for key, (_, timestamp) in itertools.islice(self._cache.items(), 32)
+                    if now - timestamp >= self._cache_ttl_ns
+                ]
+                for key in expired:
+                    del self._cache[key]
     
     def call_tool_sync(self, server: str, tool_name: str, arguments: dict) -> str:
         """
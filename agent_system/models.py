@@ -1,7 +1,22 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
+import re
 import threading
 
+# Findings that mark a plan domain as delivered. Compiled once so each
+# add_finding() is a single regex search per domain instead of a Python-level
+# substring loop over every keyword.
+_PLAN_COMPLETION_PATTERNS = {
+    domain: re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+    for domain, keywords in {
+        "nutrition": ["completed: nutrition", "nutrition plan"],
+        "fitness": ["completed: fitness", "fitness plan"],
+        "sleep": ["completed: sleep", "sleep plan"],
+        "mindfulness": ["completed: mindfulness", "stress plan", "mindfulness plan"],
+        "supplements": ["supplement plan", "vitamin plan", "completed: supplements"],
+    }.items()
+}
+
 class Message(BaseModel):
     role: str
     content: str
@@ -88,19 +103,12 @@ class AgentContext(BaseModel):
             return [d for d in self.pending_plan_domains if not self.plan_domain_flags.get(d, False)]
 
     def _register_plan_completion(self, finding: str):
-        lower = finding.lower()
-        mapping = {
-            "nutrition": ["completed: nutrition", "nutrition plan"],
-            "fitness": ["completed: fitness", "fitness plan"],
-            "sleep": ["completed: sleep", "sleep plan"],
-            "mindfulness": ["completed: mindfulness", "stress plan", "mindfulness plan"],
-            "supplements": ["supplement plan", "vitamin plan", "completed: supplements"],
-        }
-        for domain, keywords in mapping.items():
-            if any(keyword in lower for keyword in keywords):
-                self.plan_domain_flags[domain] = True
-                if domain in self.pending_plan_domains:
-                    self.pending_plan_domains = [d for d in self.pending_plan_domains if d != domain]
+        completed = [domain for domain, pattern in _PLAN_COMPLETION_PATTERNS.items() if pattern.search(finding)]
+        if not completed:
+            return
+        for domain in completed:
+            self.plan_domain_flags[domain] = True
+        self.pending_plan_domains = [d for d in self.pending_plan_domains if d not in completed]
     
     def cache_tool_result(self, tool_name: str, args: Dict[str, Any], result: Any):
         key = self._tool_cache_key(tool_name, args)
@@ -120,7 +128,32 @@ class AgentContext(BaseModel):
         from json import dumps
         return f"{tool_name}:{dumps(args, sort_keys=True)}"
     
+    def routing_inputs(self) -> tuple:
+        """Hashable snapshot of the state an agent's run and routing depend on."""
+        with self._lock:
+            state = self.state
+            return (
+                self.data_version,
+                len(self.history),
+                len(self.accumulated_findings),
+                tuple(sorted(self.flags.items())),
+                tuple(self.pending_plan_domains),
+                tuple(sorted(self.plan_domain_flags.items())),
+                state.stage,
+                state.intent,
+                state.focus,
+            )
+    
     def increment_data_version(self):
         with self._lock:
             self.data_version += 1
             self.tool_cache.clear()
+    
+    def sync_data_version(self, generation: int) -> bool:
+        """Catch up with a newer global data generation. Returns True if the context was stale."""
+        with self._lock:
+            if self.data_version >= generation:
+                return False
+            self.data_version = generation
+            self.tool_cache.clear()
+            return True
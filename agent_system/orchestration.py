@@ -5,14 +5,54 @@ from .session_manager import SessionManager
 from .intelligence import IntentClassifier
 from .feedback import record_feedback
 from analytics.feedback_analytics import FeedbackAnalytics
+import atexit
+import logging
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, Future
 import os
 from pathlib import Path
 import re
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Any
+
+
+logger = logging.getLogger(__name__)
+
+# Mesh runs allowed at once. web_app sizes its request pool with this, and the
+# shared agent pool below is sized from it, so both follow one setting.
+ORCH_WORKERS = int(os.environ.get("ORCH_WORKERS", "16"))
+
+_CONFIRMED_STATUSES = frozenset({"confirmed", "yes", "y", "accept", "accepted", "affirmed"})
+_DECLINED_STATUSES = frozenset({"declined", "no", "n", "rejected"})
+
+# Specialist that owns each plan domain (supplements are covered by the planner)
+_PLAN_DOMAIN_AGENTS = {
+    "nutrition": "Nutritionist",
+    "fitness": "Fitness Coach",
+    "sleep": "Sleep Doctor",
+    "mindfulness": "Mindfulness Coach",
+    "supplements": None
+}
+
+
+class _AnyEvent:
+    """Read-only view of several events that reports set once any of them is."""
+    __slots__ = ("_events",)
+    
+    def __init__(self, *events: Optional[threading.Event]):
+        self._events = tuple(e for e in events if e is not None)
+    
+    def is_set(self) -> bool:
+        return any(e.is_set() for e in self._events)
+
+
+def _dedupe(names: List[str]) -> List[str]:
+    """Order-preserving dedupe tuned for the 1-5 agent names a hop produces."""
+    if len(names) <= 1:
+        return list(names)
+    seen = set()
+    return [name for name in names if not (name in seen or seen.add(name))]
 
 
 class Orchestrator:
@@ -22,10 +62,21 @@ class Orchestrator:
         self.session_manager = SessionManager(session_timeout_minutes=60)
         self.intent_classifier = IntentClassifier()
         self.feedback_analytics = FeedbackAnalytics()
+        # The agent set is fixed after construction, so filter these once
+        self._plan_specialist_agents = tuple(
+            a for a in ("Nutritionist", "Fitness Coach", "Sleep Doctor", "Mindfulness Coach")
+            if a in self.agents
+        )
+        self._default_speculative = frozenset({"Conversation Planner"} & self.agents.keys())
+        self._physician_available = "Physician" in self.agents
         
-        self._response_cache = {}
+        # FIFO with a TTL, not LRU: entries stay in insertion order so the oldest
+        # is both the next to expire and the first evicted once max_size is hit
+        self._response_cache: OrderedDict = OrderedDict()
         self._response_cache_lock = threading.Lock()
         self._response_cache_ttl = 300
+        self._response_cache_ttl_ns = self._response_cache_ttl * 1_000_000_000
+        self._response_cache_max_size = 1000
         
         self._data_files = [
             'servers/user_data/data/biomarkers.json',
@@ -34,81 +85,211 @@ class Orchestrator:
             'servers/user_data/data/sleep.json',
             'servers/user_data/data/profile.json'
         ]
+        self._data_files_by_dir: Dict[str, Dict[str, str]] = {}
+        for file_path in self._data_files:
+            directory, name = os.path.split(file_path)
+            self._data_files_by_dir.setdefault(directory, {})[name] = file_path
         self._last_data_check = {}
+        # Feedback analytics and data files change rarely; re-read them at most
+        # once per interval rather than on every request of a burst
+        self._refresh_interval_ns = 2_000_000_000
+        self._last_refresh_ns = 0
+        # Global data generation: bumped once per detected change, and every
+        # session compares its data_version against it
+        self._data_generation = 0
+        self._data_generation_lock = threading.Lock()
         self._init_data_tracking()
         
+        # Long-lived pool shared by every request so agent hops don't pay for
+        # thread start-up/teardown on each turn. Agent runs wait on LLM I/O, so
+        # size it for every admitted mesh run's widest hop (Guardrail plus
+        # speculative runs, or the plan specialists plus the planner) rather
+        # than for CPU count, or requests queue behind each other's LLM calls.
+        agents_per_hop = max(
+            len(self._default_speculative) + 2,
+            len(self._plan_specialist_agents) + 1,
+        )
+        self._agent_executor = ThreadPoolExecutor(
+            max_workers=ORCH_WORKERS * agents_per_hop,
+            thread_name_prefix="agent",
+        )
+        atexit.register(self.close)
+    
+    def close(self):
+        """Shut down the shared agent pool."""
+        self._agent_executor.shutdown(wait=True)
+        
     def _init_data_tracking(self):
-        for file_path in self._data_files:
+        self._last_data_check.update(self._scan_data_mtimes())
+    
+    def _scan_data_mtimes(self) -> Dict[str, float]:
+        """One directory listing per data dir; files missing from it are never stat'ed."""
+        mtimes = {}
+        for directory, wanted in self._data_files_by_dir.items():
             try:
-                if os.path.exists(file_path):
-                    self._last_data_check[file_path] = os.path.getmtime(file_path)
-            except Exception:
-                pass
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        file_path = wanted.get(entry.name)
+                        if file_path is not None:
+                            mtimes[file_path] = entry.stat().st_mtime
+            except OSError:
+                continue
+        return mtimes
     
-    def _check_data_updates(self, context: AgentContext):
+    def bump_data_generation(self) -> int:
+        """Invalidate data-dependent caches for every session. Call after writing user data."""
+        with self._data_generation_lock:
+            self._data_generation += 1
+            return self._data_generation
+    
+    def _refresh_shared_state(self):
+        now = time.monotonic_ns()
+        if now - self._last_refresh_ns < self._refresh_interval_ns:
+            return
+        self._last_refresh_ns = now
+        self.feedback_analytics.refresh()
+        self._poll_data_files()
+    
+    def _poll_data_files(self):
         data_changed = False
-        for file_path in self._data_files:
-            try:
-                if os.path.exists(file_path):
-                    current_mtime = os.path.getmtime(file_path)
-                    last_mtime = self._last_data_check.get(file_path, 0)
-                    if current_mtime > last_mtime:
-                        data_changed = True
-                        self._last_data_check[file_path] = current_mtime
-            except Exception:
-                pass
+        for file_path, current_mtime in self._scan_data_mtimes().items():
+            last_mtime = self._last_data_check.get(file_path, 0)
+            if current_mtime > last_mtime:
+                data_changed = True
+                self._last_data_check[file_path] = current_mtime
         if data_changed:
-            context.increment_data_version()
-            return True
-        return False
+            self.bump_data_generation()
     
-    def _get_response_cache_key(self, user_input: str, session_id: str = None, data_version: int = 0) -> str:
-        key_str = f"{session_id}:{data_version}:{user_input.lower().strip()}"
-        return hashlib.md5(key_str.encode()).hexdigest()
+    def _check_data_updates(self, context: AgentContext):
+        self._refresh_shared_state()
+        return context.sync_data_version(self._data_generation)
     
-    def _get_from_response_cache(self, cache_key: str) -> tuple:
+    def _get_response_cache_key(self, user_input: str, session_id: str = None, data_version: int = 0) -> tuple:
+        # The tuple is hashed by the dict itself; no digest needed for keying
+        return (session_id, data_version, user_input.lower().strip())
+    
+    def _get_from_response_cache(self, cache_key: tuple) -> tuple:
+        # Lock-free fast path: dict.get is atomic under the GIL and hits don't
+        # reorder entries (TTL runs from insertion, so insertion order is
+        # already expiry order)
+        entry = self._response_cache.get(cache_key)
+        if entry is None:
+            return None, None, None, False
+        response, session_id, widgets, timestamp = entry
+        if time.monotonic_ns() - timestamp < self._response_cache_ttl_ns:
+            return response, session_id, widgets, True
         with self._response_cache_lock:
-            if cache_key in self._response_cache:
-                response, session_id, widgets, timestamp = self._response_cache[cache_key]
-                age = time.time() - timestamp
-                if age < self._response_cache_ttl:
-                    return response, session_id, widgets, True
-                else:
-                    del self._response_cache[cache_key]
+            # Another thread may have refreshed the entry since we read it
+            if self._response_cache.get(cache_key) is entry:
+                del self._response_cache[cache_key]
         return None, None, None, False
     
-    def _put_in_response_cache(self, cache_key: str, response: str, session_id: str, widgets: list):
+    def _put_in_response_cache(self, cache_key: tuple, response: str, session_id: str, widgets: list):
+        now = time.monotonic_ns()
         with self._response_cache_lock:
-            self._response_cache[cache_key] = (response, session_id, widgets, time.time())
-            if len(self._response_cache) > 1000:
-                sorted_items = sorted(self._response_cache.items(), key=lambda x: x[1][3])
-                for key, _ in sorted_items[:200]:
-                    del self._response_cache[key]
+            # Sweep expired entries from the cold end; stops at the first live one
+            cache = self._response_cache
+            while cache and now - next(iter(cache.values()))[3] >= self._response_cache_ttl_ns:
+                cache.popitem(last=False)
+            cache.pop(cache_key, None)
+            cache[cache_key] = (response, session_id, widgets, now)
+            while len(cache) > self._response_cache_max_size:
+                cache.popitem(last=False)
+    
+    def _resolve_agent_names(self, names: List[str]) -> List[str]:
+        """Swap unknown agents for Critic and dedupe, preserving order, in one pass."""
+        agents = self.agents
+        seen = set()
+        resolved = []
+        for name in names:
+            if name not in agents:
+                name = "Critic"
+            if name not in seen:
+                seen.add(name)
+                resolved.append(name)
+        return resolved
+    
+    def _run_agent(self, agent_name: str, context: AgentContext, agent_runs: Dict[tuple, Future], inline: bool = False,
+                   on_event: Optional[Callable[[str, Any], None]] = None,
+                   abort_event: Optional[threading.Event] = None) -> Future:
+        """
+        Run an agent once per distinct input within a request.
+        
+        A re-request of an agent whose inputs (see AgentContext.routing_inputs:
+        data version, history, findings, flags, plan domains, conversation
+        state) haven't changed reuses the earlier run's future instead of
+        paying for another LLM round trip. inline=True runs on the calling
+        thread and returns an already-completed future.
+        """
+        key = (agent_name, context.routing_inputs())
+        future = agent_runs.get(key)
+        if future is not None:
+            logger.debug("♻️  Reusing %s run (inputs unchanged)", agent_name)
+            return future
+        if inline:
+            future = Future()
+            try:
+                future.set_result(self.agents[agent_name].run(context, abort_event, on_event))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self._agent_executor.submit(self.agents[agent_name].run, context, abort_event, on_event)
+        agent_runs[key] = future
+        return future
     
-    def run_mesh(self, user_input: str, session_id: str = None) -> tuple[str, str, list]:
-        total_start = time.time()
-        print(f"\n>>> New Request: {user_input}")
+    def _abandon_speculation(self, active_futures: Dict[str, Future], abort_event: threading.Event):
+        """Cancel unconsumed speculative runs and wait for in-flight ones to bail out."""
+        if not active_futures:
+            return
+        abort_event.set()
+        for future in active_futures.values():
+            future.cancel()
+        # Aborted runs return at their next checkpoint; waiting keeps late
+        # writes out of the context that is about to be persisted
+        wait(active_futures.values())
+        active_futures.clear()
+    
+    def run_mesh(self, user_input: str, session_id: str = None,
+                 on_event: Optional[Callable[[str, Any], None]] = None,
+                 abort_event: Optional[threading.Event] = None) -> tuple[str, str, list]:
+        """
+        Run one user turn through the mesh.
+        
+        on_event, when given, is passed to every agent run and receives
+        ("agent", name) and the Critic's ("stream", text) draft chunks as they
+        happen, so callers can stream progress without scraping stdout. The
+        returned response is the finalized text and supersedes the draft.
         
-        if session_id:
+        Setting abort_event (for example when the client has gone away) stops
+        the turn at the next agent checkpoint or hop; an aborted turn is not
+        cached.
+        """
+        total_start = time.monotonic()
+        logger.debug(">>> New Request: %s", user_input)
+        
+        is_new_session = not session_id
+        if not is_new_session:
             context = self.session_manager.get_session(session_id)
-            print(f">>> Continuing conversation (Session: {session_id[:8]}...)")
+            logger.debug(">>> Continuing conversation (Session: %s...)", session_id[:8])
         else:
             session_id = self.session_manager.create_session(user_input)
             context = self.session_manager.get_session(session_id)
-            print(f">>> New conversation (Session: {session_id[:8]}...)")
-        
-        self.feedback_analytics.refresh()
-        context.insights["feedback_summary"] = self.feedback_analytics.get_summary()
+            logger.debug(">>> New conversation (Session: %s...)", session_id[:8])
         
-        self._check_data_updates(context)
-        context.trace = [f"User input: {user_input}"]
-        
-        if session_id:
-            cache_key = self._get_response_cache_key(user_input, session_id, context.data_version)
+        # Look the response up before any per-request work so hits return
+        # without touching the context. A freshly minted session id cannot have
+        # cached responses yet.
+        cache_key = self._get_response_cache_key(user_input, session_id, context.data_version)
+        if not is_new_session:
             cached_response, cached_session_id, cached_widgets, hit = self._get_from_response_cache(cache_key)
             if hit:
-                print(f"💾 RESPONSE CACHE HIT")
-                return cached_response, cached_session_id, cached_widgets or [], context.trace
+                logger.debug("💾 RESPONSE CACHE HIT")
+                return cached_response, cached_session_id, cached_widgets or [], [f"User input: {user_input}"]
+        
+        if self._check_data_updates(context):
+            cache_key = self._get_response_cache_key(user_input, session_id, context.data_version)
+        context.insights["feedback_summary"] = self.feedback_analytics.get_summary()
+        context.trace = [f"User input: {user_input}"]
         
         context.pending_widgets.clear()
         
@@ -121,96 +302,128 @@ class Orchestrator:
         context.hop_count = 0
         
         # SPECULATIVE EXECUTION: Start Conversation Planner immediately
-        speculative_agents = {"Conversation Planner"}
-        plan_specialist_agents = ["Nutritionist", "Fitness Coach", "Sleep Doctor", "Mindfulness Coach"]
+        speculative_agents = self._default_speculative
+        plan_specialist_agents = self._plan_specialist_agents
         
         state = context.state
-        if state.focus == "diagnosis" and not context.get_flag("biomarkers_ready"):
-            speculative_agents.add("Physician")
+        if (self._physician_available and state.focus == "diagnosis"
+                and not context.get_flag("biomarkers_ready")):
+            speculative_agents = speculative_agents | {"Physician"}
         
-        speculative_agents = {a for a in speculative_agents if a in self.agents}
-        print(f"🚀 Speculative Execution: Guardrail + {', '.join(speculative_agents)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("🚀 Speculative Execution: Guardrail + %s", ", ".join(speculative_agents))
         
         active_futures: Dict[str, Future] = {}
+        # Set once speculative runs are known to be unneeded; agents check it
+        # between LLM chunks and stop at the next checkpoint (partial traces or
+        # findings from steps already taken may remain)
+        speculation_abort = threading.Event()
+        # Speculative runs also stop when the whole request is aborted, so a
+        # disconnect mid-hop doesn't wait out their LLM calls and tool loops
+        speculative_abort_view = _AnyEvent(speculation_abort, abort_event)
+        # Runs made during this request, keyed by the inputs they saw
+        agent_runs: Dict[tuple, Future] = {}
         
-        with ThreadPoolExecutor(max_workers=len(speculative_agents) + 1 + 4) as executor:
-            active_futures["Guardrail"] = executor.submit(self.agents["Guardrail"].run, context)
+        executor = self._agent_executor
+        try:
+            active_futures["Guardrail"] = executor.submit(self.agents["Guardrail"].run, context, abort_event, on_event)
             for agent_name in speculative_agents:
-                active_futures[agent_name] = executor.submit(self.agents[agent_name].run, context)
-            
+                active_futures[agent_name] = executor.submit(
+                    self.agents[agent_name].run, context, speculative_abort_view, on_event
+                )
+        
             try:
-                guardrail_result = active_futures["Guardrail"].result()
+                guardrail_result = active_futures.pop("Guardrail").result()
             except Exception as e:
-                print(f"❌ Guardrail Error: {e}")
+                logger.warning("❌ Guardrail Error: %s", e)
                 guardrail_result = ["STOP"]
-            
+        
             if "STOP" in guardrail_result:
-                print("🛑 Guardrail triggered STOP.")
+                logger.info("🛑 Guardrail triggered STOP.")
                 current_agent_names = ["STOP"]
+                self._abandon_speculation(active_futures, speculation_abort)
             else:
                 current_agent_names = ["Conversation Planner"]
-            
+        
             agent_sequence = ["Guardrail"]
-            
+            planner_runs = 0
+        
             while context.hop_count < 15:
                 context.hop_count += 1
                 if "STOP" in current_agent_names:
                     break
-                
-                valid_agents = []
-                for agent_name in current_agent_names:
-                    if agent_name not in self.agents:
-                        valid_agents.append("Critic")
-                    else:
-                        valid_agents.append(agent_name)
-                current_agent_names = list(dict.fromkeys(valid_agents))
-                
-                for agent_name in current_agent_names:
-                    agent_sequence.append(agent_name)
-                
+                if abort_event is not None and abort_event.is_set():
+                    logger.debug("✋ Request aborted; stopping after %d hop(s)", context.hop_count - 1)
+                    break
+            
+                current_agent_names = self._resolve_agent_names(current_agent_names)
+            
+                agent_sequence.extend(current_agent_names)
+                if "Conversation Planner" in current_agent_names:
+                    planner_runs += 1
+            
                 # Loop prevention
-                if agent_sequence.count("Conversation Planner") >= 3:
+                if planner_runs >= 3:
                     context.add_finding("[SYSTEM]: Loop prevention - routing to Critic")
                     current_agent_names = ["Critic"]
-                
+            
                 next_agent_names = []
 
                 if len(current_agent_names) == 1:
                     agent_name = current_agent_names[0]
                     if agent_name in active_futures:
-                        print(f"⚡ Using speculative result for {agent_name}")
+                        logger.debug("⚡ Using speculative result for %s", agent_name)
                         try:
                             result = active_futures[agent_name].result()
                             del active_futures[agent_name]
                             next_agent_names.extend(result)
                         except Exception as e:
-                            print(f"❌ Error in speculative {agent_name}: {e}")
+                            logger.warning("❌ Error in speculative %s: %s", agent_name, e)
                             next_agent_names.append("Critic")
                     else:
-                        next_agent_names = self.agents[agent_name].run(context)
+                        next_agent_names = list(self._run_agent(agent_name, context, agent_runs, inline=True, on_event=on_event, abort_event=abort_event).result())
                 else:
-                    print(f"\n⚡ PARALLEL EXECUTION: {len(current_agent_names)} agents: {', '.join(current_agent_names)}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("⚡ PARALLEL EXECUTION: %d agents: %s", len(current_agent_names), ", ".join(current_agent_names))
+                    # For a pair, run one agent on this thread instead of paying for
+                    # a second submit; prefer one that has no speculative future
+                    inline_agent = None
+                    if len(current_agent_names) == 2:
+                        inline_agent = next(
+                            (a for a in reversed(current_agent_names) if a not in active_futures), None
+                        )
                     batch_futures = {}
                     for agent_name in current_agent_names:
+                        if agent_name == inline_agent:
+                            continue
                         if agent_name in active_futures:
-                            print(f"⚡ Using running future for {agent_name}")
+                            logger.debug("⚡ Using running future for %s", agent_name)
                             batch_futures[active_futures[agent_name]] = agent_name
                             del active_futures[agent_name]
                         else:
-                            f = executor.submit(self.agents[agent_name].run, context)
+                            f = self._run_agent(agent_name, context, agent_runs, on_event=on_event, abort_event=abort_event)
                             batch_futures[f] = agent_name
-                    
+                
+                    if inline_agent:
+                        try:
+                            next_agent_names.extend(
+                                self._run_agent(inline_agent, context, agent_runs, inline=True, on_event=on_event, abort_event=abort_event).result()
+                            )
+                        except Exception as e:
+                            logger.warning("❌ Error in %s: %s", inline_agent, e)
+                            next_agent_names.append("Critic")
+                
                     for future in as_completed(batch_futures):
                         agent_name = batch_futures[future]
                         try:
                             result = future.result()
                             next_agent_names.extend(result)
                         except Exception as e:
-                            print(f"  ❌ Error in {agent_name}: {e}")
+                            logger.warning("❌ Error in %s: %s", agent_name, e)
                             next_agent_names.append("Critic")
-                
-                deduped_next = list(dict.fromkeys(next_agent_names))
-                
+            
+                deduped_next = _dedupe(next_agent_names)
+            
                 # If user confirmed they want a plan, ensure all plan specialists are routed
                 if context.get_flag("plan_request_pending"):
                     missing_agents = [agent for agent in plan_specialist_agents if agent not in deduped_next]
@@ -221,22 +434,19 @@ class Orchestrator:
                         context.set_flag("plan_request_pending", False)
                 pending_domains = context.get_pending_plan_domains()
                 if pending_domains:
-                    required_agents = {
-                        "nutrition": "Nutritionist",
-                        "fitness": "Fitness Coach",
-                        "sleep": "Sleep Doctor",
-                        "mindfulness": "Mindfulness Coach",
-                        "supplements": None
-                    }
                     deduped_next = [agent for agent in deduped_next if agent != "Critic"]
                     for domain in pending_domains:
-                        agent_name = required_agents.get(domain)
+                        agent_name = _PLAN_DOMAIN_AGENTS.get(domain)
                         if agent_name and agent_name not in deduped_next:
                             deduped_next.append(agent_name)
                 current_agent_names = deduped_next
+        finally:
+            # Stop and wait for leftover speculative runs, even if a hop raised,
+            # so none of them writes into the context after it is persisted
+            self._abandon_speculation(active_futures, speculation_abort)
         
-        total_time = time.time() - total_start
-        print(f"⏱️  TOTAL EXECUTION TIME: {total_time:.2f}s")
+        total_time = time.monotonic() - total_start
+        logger.debug("⏱️  TOTAL EXECUTION TIME: %.2fs", total_time)
         
         self.session_manager.update_session(session_id, context)
             
@@ -246,15 +456,14 @@ class Orchestrator:
             widgets = list(context.pending_widgets)
             context.pending_widgets.clear()
             
-            cache_key = self._get_response_cache_key(user_input, session_id, context.data_version)
-            self._put_in_response_cache(cache_key, final_response, session_id, widgets)
+            if abort_event is None or not abort_event.is_set():
+                self._put_in_response_cache(cache_key, final_response, session_id, widgets)
             
             if widgets:
-                print(f"📦 Returning {len(widgets)} widget(s) to CLIENT", flush=True)
-                for w in widgets:
-                    print(f"  - {w['type']}", flush=True)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("📦 Returning %d widget(s) to CLIENT: %s", len(widgets), ", ".join(w['type'] for w in widgets))
             else:
-                print("🚫 No widgets returned to client")
+                logger.debug("🚫 No widgets returned to client")
             
             return final_response, session_id, widgets, context.trace
         return "System Error: No response generated.", session_id, [], context.trace
@@ -270,16 +479,16 @@ class Orchestrator:
         confirmation_status = (classification.get("confirmation_status") or "none").lower()
         
         context.add_trace(f"LLM classification: {classification}")
-        print(f"  🧠 Intent Classification: {classification}")
+        logger.debug("🧠 Intent Classification: %s", classification)
         record_feedback("intent_classified", classification)
         
         # Handle Confirmation Logic
-        if confirmation_status in {"confirmed", "yes", "y", "accept", "accepted", "affirmed"}:
+        if confirmation_status in _CONFIRMED_STATUSES:
             state.set_focus("plan")
             state.set_intent("plan")
             context.set_flag("plan_request_pending", True)
             return
-        elif confirmation_status in {"declined", "no", "n", "rejected"}:
+        elif confirmation_status in _DECLINED_STATUSES:
             state.set_focus("diagnosis")
             state.set_intent("diagnosis")
             context.set_flag("plan_request_pending", False)
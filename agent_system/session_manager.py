@@ -1,81 +1,122 @@
+import time
 import uuid
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
 from .models import AgentContext, Message
 import threading
 
+# Unrelated sessions land on different shards so they don't contend for one lock
+_SHARD_COUNT = 16
+_SHARD_MASK = _SHARD_COUNT - 1
+
+# (lock, sessions, last-touch times from time.monotonic(), creation datetimes)
+_Shard = Tuple[threading.Lock, Dict[str, AgentContext], Dict[str, float], Dict[str, datetime]]
+
 class SessionManager:
     """Manages conversation sessions and their histories."""
     
-    def __init__(self, session_timeout_minutes: int = 60):
-        self.sessions: Dict[str, AgentContext] = {}
-        self.session_timestamps: Dict[str, datetime] = {}
-        self.session_timeout = timedelta(minutes=session_timeout_minutes)
-        self._lock = threading.Lock()
+    def __init__(self, session_timeout_minutes: int = 60, cleanup_interval_seconds: float = 60.0):
+        self._shards: List[_Shard] = [
+            (threading.Lock(), {}, {}, {}) for _ in range(_SHARD_COUNT)
+        ]
+        self.session_timeout_s = session_timeout_minutes * 60.0
+        self.cleanup_interval_s = float(cleanup_interval_seconds)
+        self._list_cleanup_interval_s = 30.0
+        self._last_cleanup = time.monotonic()
+        self._cleanup_lock = threading.Lock()
+    
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) & _SHARD_MASK]
     
     def create_session(self, user_intent: str = "") -> str:
         """Create a new session and return its ID."""
         session_id = str(uuid.uuid4())
-        with self._lock:
-            self.sessions[session_id] = AgentContext(user_intent=user_intent)
-            self.session_timestamps[session_id] = datetime.now()
+        lock, sessions, timestamps, created = self._shard(session_id)
+        with lock:
+            sessions[session_id] = AgentContext(user_intent=user_intent)
+            timestamps[session_id] = time.monotonic()
+            created[session_id] = datetime.now()
         return session_id
     
     def get_session(self, session_id: str) -> Optional[AgentContext]:
         """Retrieve a session by ID, creating one if it doesn't exist."""
-        with self._lock:
-            # Clean up old sessions first
+        now = time.monotonic()
+        if now - self._last_cleanup > self.cleanup_interval_s:
             self._cleanup_old_sessions()
-            
-            # If session doesn't exist, create it
-            if session_id not in self.sessions:
-                self.sessions[session_id] = AgentContext(user_intent="")
-                self.session_timestamps[session_id] = datetime.now()
-            
-            # Update timestamp
-            self.session_timestamps[session_id] = datetime.now()
-            return self.sessions[session_id]
+        
+        lock, sessions, timestamps, created = self._shard(session_id)
+        # Fast path: dict get/set are atomic under the GIL, so existing
+        # sessions are served without taking the shard lock
+        context = sessions.get(session_id)
+        last_seen = timestamps.get(session_id)
+        if context is not None and last_seen is not None and now - last_seen <= self.session_timeout_s:
+            timestamps[session_id] = now
+            return context
+        
+        with lock:
+            # If session doesn't exist (or has timed out), create it
+            last_seen = timestamps.get(session_id)
+            if session_id not in sessions or last_seen is None or now - last_seen > self.session_timeout_s:
+                sessions[session_id] = AgentContext(user_intent="")
+                created[session_id] = datetime.now()
+            timestamps[session_id] = now
+            return sessions[session_id]
     
     def update_session(self, session_id: str, context: AgentContext):
         """Update a session's context."""
-        with self._lock:
-            self.sessions[session_id] = context
-            self.session_timestamps[session_id] = datetime.now()
+        lock, sessions, timestamps, created = self._shard(session_id)
+        with lock:
+            sessions[session_id] = context
+            timestamps[session_id] = time.monotonic()
+            created.setdefault(session_id, datetime.now())
     
     def delete_session(self, session_id: str):
         """Delete a session."""
-        with self._lock:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-            if session_id in self.session_timestamps:
-                del self.session_timestamps[session_id]
+        lock, sessions, timestamps, created = self._shard(session_id)
+        with lock:
+            sessions.pop(session_id, None)
+            timestamps.pop(session_id, None)
+            created.pop(session_id, None)
     
     def _cleanup_old_sessions(self):
-        """Remove sessions that have timed out. Called from within lock - do NOT call delete_session."""
-        now = datetime.now()
-        expired_sessions = [
-            session_id for session_id, timestamp in self.session_timestamps.items()
-            if now - timestamp > self.session_timeout
-        ]
-        # Delete directly (we're already inside the lock - calling delete_session would deadlock)
-        for session_id in expired_sessions:
-            if session_id in self.sessions:
-                del self.sessions[session_id]
-            if session_id in self.session_timestamps:
-                del self.session_timestamps[session_id]
+        """Remove sessions that have timed out, holding each shard lock only briefly."""
+        # Only one thread sweeps at a time; others skip rather than queue up
+        if not self._cleanup_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            self._last_cleanup = now
+            timeout = self.session_timeout_s
+            for lock, sessions, timestamps, created in self._shards:
+                with lock:
+                    expired_sessions = [
+                        sid for sid, t in list(timestamps.items())
+                        if now - t > timeout
+                    ]
+                    for session_id in expired_sessions:
+                        sessions.pop(session_id, None)
+                        timestamps.pop(session_id, None)
+                        created.pop(session_id, None)
+        finally:
+            self._cleanup_lock.release()
     
     def list_sessions(self) -> Dict[str, dict]:
         """List all active sessions with metadata."""
-        with self._lock:
+        if time.monotonic() - self._last_cleanup > self._list_cleanup_interval_s:
             self._cleanup_old_sessions()
-            return {
-                session_id: {
-                    'created': timestamp.isoformat(),
-                    'message_count': len(context.history),
-                    'user_intent': context.user_intent
-                }
-                for session_id, (timestamp, context) in 
-                [(sid, (self.session_timestamps[sid], self.sessions[sid])) 
-                 for sid in self.sessions.keys()]
+        snapshot = []
+        for lock, sessions, _, created in self._shards:
+            with lock:
+                snapshot.extend(
+                    (sid, context, created.get(sid)) for sid, context in sessions.items()
+                )
+        
+        # Serialize outside the locks; ISO strings are only built for the response
+        return {
+            session_id: {
+                'created': created.isoformat() if created else None,
+                'message_count': len(context.history),
+                'user_intent': context.user_intent
             }
-
+            for session_id, context, created in snapshot
+        }
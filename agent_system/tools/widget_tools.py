@@ -8,18 +8,33 @@ observability, and deduplication helpers for the base agent.
 
 from __future__ import annotations
 
-import json
+import threading
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
 
 from ..widget_helper import WidgetHelper
 
 
+def _canon(value: Any) -> Any:
+    """Convert tool args into a hashable, order-independent form."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _canon(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canon(v) for v in value)
+    return value
+
+
 class WidgetToolset:
     """Manages widget tool declarations and execution."""
 
     def __init__(self, helper: Optional[WidgetHelper] = None):
         self.helper = helper or WidgetHelper()
+        # Widget tools are pure over the data files, so repeat calls are memoized
+        # per (signature, helper data version)
+        self._exec_cache: OrderedDict = OrderedDict()
+        self._exec_cache_maxsize = 256
+        self._exec_cache_lock = threading.Lock()
         self._tool_declarations = [
             {
                 "name": "return_workout_widget",
@@ -88,13 +103,14 @@ class WidgetToolset:
     def is_widget_tool(self, tool_name: str) -> bool:
         return tool_name in self._handlers
 
-    def get_signature(self, tool_name: str, args: Dict[str, Any]) -> str:
-        """Stable signature for deduplication and observability."""
+    def get_signature(self, tool_name: str, args: Dict[str, Any]) -> Hashable:
+        """Stable, hashable signature for deduplication; repr() it for logging."""
         try:
-            serialized = json.dumps(args, sort_keys=True)
-        except (TypeError, ValueError):
-            serialized = repr(args)
-        return f"{tool_name}:{serialized}"
+            signature = (tool_name, _canon(args))
+            hash(signature)
+        except TypeError:
+            signature = (tool_name, repr(args))
+        return signature
 
     def execute(self, tool_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -109,14 +125,32 @@ class WidgetToolset:
         if not handler:
             return {"widget": None, "duration_ms": 0, "args": args}
 
+        signature = self.get_signature(tool_name, args)
+        version = self.helper.data_version()
+        cache_key = (signature, version)
+        with self._exec_cache_lock:
+            cached = self._exec_cache.get(cache_key)
+            if cached is not None:
+                self._exec_cache.move_to_end(cache_key)
+        if cached is not None:
+            return {**cached, "duration_ms": 0, "args": args}
+
         start = time.time()
         widget_payload = handler(args)
         duration_ms = int((time.time() - start) * 1000)
-        return {
+        execution = {
             "widget": widget_payload,
             "duration_ms": duration_ms,
             "args": args,
         }
+        # A handler that (re)loaded a data file bumped cache_version; read it back
+        # rather than revalidating every file again through data_version()
+        store_key = (signature, (self.helper.cache_version, version[1]))
+        with self._exec_cache_lock:
+            self._exec_cache[store_key] = execution
+            while len(self._exec_cache) > self._exec_cache_maxsize:
+                self._exec_cache.popitem(last=False)
+        return execution
 
     # --- Individual widget executors -------------------------------------------------
 
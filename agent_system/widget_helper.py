@@ -2,34 +2,104 @@
 Widget Helper - Loads widget data from resource files for agent responses.
 """
 
-import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
+import json_utils
+
+# Meal-plan date label only changes once a day; refresh it at most once a minute
+_DATE_LABEL_TTL = 60.0
+_DATE_CACHE = {"ts": float("-inf"), "label": ""}
+
+
+def _today_label() -> str:
+    now = time.monotonic()
+    if now - _DATE_CACHE["ts"] > _DATE_LABEL_TTL:
+        _DATE_CACHE["label"] = datetime.now().strftime("%a, %b %d, %Y")
+        _DATE_CACHE["ts"] = now
+    return _DATE_CACHE["label"]
+
 class WidgetHelper:
     """Helper class to load and format widget data for agent responses."""
     
     def __init__(self):
         self.data_dir = Path(__file__).parent.parent / "servers" / "resources" / "data"
         self._cache = {}
+        self._stat_interval_ns = 500_000_000
+        # Bumped whenever a data file is (re)loaded or disappears
+        self.cache_version = 0
     
-    def _load_json(self, file_path: Path):
-        """Load JSON with simple mtime-based caching."""
+    def _load_entry(self, file_path: Path):
+        """Load JSON with simple mtime-based caching; returns the cache entry."""
+        cache_entry = self._cache.get(file_path)
+        now_ns = time.monotonic_ns()
+        # Widget data changes rarely: trust a recently validated entry without a stat
+        if cache_entry and now_ns - cache_entry["checked_ns"] < self._stat_interval_ns:
+            return cache_entry
+        
         try:
-            mtime = file_path.stat().st_mtime
+            mtime = os.stat(file_path).st_mtime
         except FileNotFoundError:
+            if self._cache.pop(file_path, None) is not None:
+                self.cache_version += 1
             return None
         
-        cache_entry = self._cache.get(file_path)
         if cache_entry and cache_entry["mtime"] == mtime:
-            return cache_entry["data"]
+            cache_entry["checked_ns"] = now_ns
+            return cache_entry
         
-        with open(file_path) as f:
-            data = json.load(f)
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except FileNotFoundError:
+            return None
+        # Take the mtime from the open descriptor so it matches what we parse
+        with os.fdopen(fd, "rb") as f:
+            mtime = os.fstat(fd).st_mtime
+            raw = f.read()
+        data = json_utils.loads(raw)
+        
+        cache_entry = {"mtime": mtime, "checked_ns": now_ns, "data": data, **self._build_indexes(data)}
+        self._cache[file_path] = cache_entry
+        self.cache_version += 1
+        return cache_entry
+    
+    def data_version(self) -> tuple:
+        """Revalidate loaded files and return a token that changes with widget output."""
+        for file_path in list(self._cache):
+            self._load_entry(file_path)
+        # Meal plans embed today's date, so the label is part of the version
+        return self.cache_version, _today_label()
+    
+    def _load_json(self, file_path: Path):
+        """Load JSON with simple mtime-based caching."""
+        cache_entry = self._load_entry(file_path)
+        return cache_entry["data"] if cache_entry else None
+    
+    @staticmethod
+    def _build_indexes(data) -> dict:
+        """Lowercase lookups built once per load so matching doesn't re-lower every item."""
+        if not isinstance(data, list):
+            return {"index_by_lower_name": {}, "index_by_lower_id": {}, "lowered": ()}
+        
+        index_by_lower_name = {}
+        index_by_lower_id = {}
+        lowered = []
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            lower_name = str(item.get('name', '')).lower()
+            lower_id = str(item.get('id', '')).lower()
+            index_by_lower_name.setdefault(lower_name, item)
+            index_by_lower_id.setdefault(lower_id, item)
+            lowered.append((lower_name, lower_id, str(item.get('difficulty', '')).lower(), item))
         
-        self._cache[file_path] = {"mtime": mtime, "data": data}
-        return data
+        return {
+            "index_by_lower_name": index_by_lower_name,
+            "index_by_lower_id": index_by_lower_id,
+            "lowered": tuple(lowered),
+        }
     
     def get_workout_widget(self, goal: str) -> dict:
         """
@@ -43,13 +113,14 @@ class WidgetHelper:
         """
         workouts_file = self.data_dir / "workouts.json"
         
-        workouts = self._load_json(workouts_file)
-        if not workouts:
+        entry = self._load_entry(workouts_file)
+        if not entry or not entry["data"]:
             return None
         
         # Find matching workout
-        for workout in workouts:
-            if goal.lower() in workout.get('name', '').lower() or goal.lower() in workout.get('difficulty', '').lower():
+        goal_lower = goal.lower()
+        for lower_name, _, lower_difficulty, workout in entry["lowered"]:
+            if goal_lower in lower_name or goal_lower in lower_difficulty:
                 return {
                     "type": "Workout plan",
                     "data": {
@@ -76,22 +147,27 @@ class WidgetHelper:
         """
         supplements_file = self.data_dir / "supplements.json"
         
-        supplements = self._load_json(supplements_file)
-        if not supplements:
+        entry = self._load_entry(supplements_file)
+        if not entry or not entry["data"]:
             return None
         
-        # Filter supplements based on requested names
+        # Filter supplements based on requested names: exact name first, then substring
+        index_by_lower_name = entry["index_by_lower_name"]
+        lowered = entry["lowered"]
         selected_supplements = []
         for name in supplement_names:
-            for supp in supplements:
-                if name.lower() in supp.get('name', '').lower():
-                    selected_supplements.append({
-                        "id": supp.get("id", supp['name'].lower().replace(" ", "-")),
-                        "name": supp['name'],
-                        "tagline": supp.get('tagline', ", ".join(supp.get('benefits', [])[:2])),
-                        "buyUrl": supp.get('buyUrl', 'https://www.thorne.com')
-                    })
-                    break
+            name_lower = name.lower()
+            supp = index_by_lower_name.get(name_lower)
+            if supp is None:
+                supp = next((item for lower_name, _, _, item in lowered if name_lower in lower_name), None)
+            if supp is None:
+                continue
+            selected_supplements.append({
+                "id": supp.get("id", supp['name'].lower().replace(" ", "-")),
+                "name": supp['name'],
+                "tagline": supp.get('tagline', ", ".join(supp.get('benefits', [])[:2])),
+                "buyUrl": supp.get('buyUrl', 'https://www.thorne.com')
+            })
         
         if not selected_supplements:
             return None
@@ -117,16 +193,20 @@ class WidgetHelper:
         """
         meals_file = self.data_dir / "meals.json"
         
-        meal_plans = self._load_json(meals_file)
+        entry = self._load_entry(meals_file)
+        meal_plans = entry["data"] if entry else None
         if not meal_plans:
             return None
         
         # Find matching meal plan
-        selected_plan = None
-        for plan in meal_plans:
-            if plan_type.lower() in plan.get('name', '').lower() or plan_type.lower() in plan.get('id', '').lower():
-                selected_plan = plan
-                break
+        plan_lower = plan_type.lower()
+        # An exact plan id wins; otherwise take the first substring match on name or id
+        selected_plan = entry["index_by_lower_id"].get(plan_lower) if plan_lower else None
+        if not selected_plan:
+            for lower_name, lower_id, _, plan in entry["lowered"]:
+                if plan_lower in lower_name or plan_lower in lower_id:
+                    selected_plan = plan
+                    break
         
         if not selected_plan and meal_plans:
             selected_plan = meal_plans[0]
@@ -135,7 +215,7 @@ class WidgetHelper:
             return None
         
         # Get current date for label
-        today = datetime.now().strftime("%a, %b %d, %Y")
+        today = _today_label()
         
         return {
             "type": "Meal plan: watch & order",
@@ -6,35 +6,126 @@ to make recommendations more actionable (e.g., workout plans with videos, meal p
 """
 
 import json
+import logging
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
-from jinja2 import Template
+from jinja2 import Environment, Template as JinjaTemplate, UndefinedError
 import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Shared environment; templates are compiled once at load and never reloaded
+_jinja_env = Environment(auto_reload=False, cache_size=-1)
+
+def _compile_tree(node: Any) -> Any:
+    """Precompile every templated string leaf of a parsed widget template."""
+    if isinstance(node, dict):
+        return {_compile_tree(k): _compile_tree(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_compile_tree(v) for v in node]
+    if isinstance(node, str) and ("{{" in node or "{%" in node):
+        return _jinja_env.from_string(node)
+    return node
+
+
+def _render_tree(node: Any, data: Dict[str, Any]) -> Any:
+    """Render a compiled template tree into fresh dicts/lists; plain leaves are shared."""
+    if isinstance(node, dict):
+        return {_render_tree(k, data): _render_tree(v, data) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_render_tree(v, data) for v in node]
+    if isinstance(node, JinjaTemplate):
+        return node.render(**data)
+    return node
+
 
 class WidgetManager:
     """Manages loading and rendering of chat widget templates."""
     
     def __init__(self, widgets_dir: str = "chat_widget_examples"):
         self.widgets_dir = widgets_dir
-        self._templates = {}  # widget_name -> widget_definition
-        self._lock = threading.Lock()
+        # widget_name -> widget_definition; never mutated in place (reloads
+        # rebind a new dict), so lookups and renders need no lock
+        self._templates = {}
+        self._widget_names: Tuple[str, ...] = ()
+        # widget file path -> (mtime, widget name or None) from the last load
+        self._file_state: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._reload_lock = threading.Lock()
         self._load_widgets()
     
-    def _load_widgets(self):
-        """Load all widget templates from the widgets directory."""
-        widget_files = Path(self.widgets_dir).glob("*.widget")
+    def _scan_widget_files(self) -> Dict[str, float]:
+        """Map each *.widget file to its mtime with a single scandir pass."""
+        try:
+            with os.scandir(self.widgets_dir) as entries:
+                return {
+                    entry.path: entry.stat().st_mtime
+                    for entry in entries
+                    if entry.name.endswith(".widget") and entry.is_file()
+                }
+        except FileNotFoundError:
+            return {}
+    
+    def _load_widgets(self) -> bool:
+        """Load widget templates, re-parsing only files that are new or changed.
         
-        for widget_file in widget_files:
-            try:
-                with open(widget_file, 'r') as f:
-                    widget_def = json.load(f)
-                    widget_name = widget_def.get('name')
-                    if widget_name:
-                        self._templates[widget_name] = widget_def
-                        print(f"  📦 Loaded widget: {widget_name}")
-            except Exception as e:
-                print(f"  ⚠️  Failed to load widget {widget_file}: {e}")
+        Returns True if the set of templates changed.
+        """
+        with self._reload_lock:
+            current = self._scan_widget_files()
+            changed = [path for path, mtime in current.items() if self._file_state.get(path, (None,))[0] != mtime]
+            removed = [path for path in self._file_state if path not in current]
+            if not changed and not removed:
+                return False
+            
+            # File reads release the GIL, so fan them out; results come back in
+            # scan order and are assembled here
+            loaded = []
+            if changed:
+                with ThreadPoolExecutor(max_workers=min(32, len(changed))) as executor:
+                    loaded = list(executor.map(self._load_one, map(Path, changed)))
+            
+            # Copy-on-write so concurrent readers always see a complete dict
+            templates = dict(self._templates)
+            for path in removed + changed:
+                _, old_name = self._file_state.pop(path, (None, None))
+                if old_name:
+                    templates.pop(old_name, None)
+            for path, entry in zip(changed, loaded):
+                widget_name = entry[0] if entry else None
+                self._file_state[path] = (current[path], widget_name)
+                if entry:
+                    templates[widget_name] = entry[1]
+                    logger.debug("📦 Loaded widget: %s", widget_name)
+            self._templates = templates
+            self._widget_names = tuple(templates)
+            return True
+    
+    def reload_if_changed(self) -> bool:
+        """Pick up added, edited or deleted widget files (e.g. from a dev server)."""
+        return self._load_widgets()
+    
+    def _load_one(self, widget_file: Path) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Read and compile a single widget file; returns (name, definition) or None."""
+        try:
+            with open(widget_file, 'r') as f:
+                widget_def = json.load(f)
+            widget_name = widget_def.get('name')
+            if not widget_name:
+                return None
+            template_str = widget_def.get('template')
+            if template_str:
+                # Templates that are valid JSON render structurally, leaf by
+                # leaf; ones using Jinja outside strings fall back to text
+                try:
+                    widget_def['_tree'] = _compile_tree(json.loads(template_str))
+                except ValueError:
+                    widget_def['_compiled'] = _jinja_env.from_string(template_str)
+            return widget_name, widget_def
+        except Exception as e:
+            logger.warning("⚠️  Failed to load widget %s: %s", widget_file, e)
+            return None
     
     def render_widget(self, widget_name: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -47,44 +138,46 @@ class WidgetManager:
         Returns:
             Rendered widget as JSON structure, or None if widget not found
         """
-        with self._lock:
-            if widget_name not in self._templates:
-                print(f"  ⚠️  Widget '{widget_name}' not found")
-                return None
-            
-            widget_def = self._templates[widget_name]
-            template_str = widget_def.get('template')
-            
-            if not template_str:
-                print(f"  ⚠️  Widget '{widget_name}' has no template")
-                return None
+        widget_def = self._templates.get(widget_name)
+        if widget_def is None:
+            logger.warning("⚠️  Widget '%s' not found", widget_name)
+            return None
+        
+        tree = widget_def.get('_tree')
+        template = widget_def.get('_compiled')
+        if tree is None and template is None:
+            logger.warning("⚠️  Widget '%s' has no template", widget_name)
+            return None
+        
+        try:
+            if tree is not None:
+                rendered = _render_tree(tree, data)
+            else:
+                # Render the precompiled Jinja2 template with provided data
+                rendered = json.loads(template.render(**data))
             
-            try:
-                # Render the Jinja2 template with provided data
-                template = Template(template_str)
-                rendered_json_str = template.render(**data)
-                rendered = json.loads(rendered_json_str)
-                
-                return {
-                    "type": widget_name,
-                    "version": widget_def.get('version', '1.0'),
-                    "data": rendered
-                }
-            except Exception as e:
-                print(f"  ❌ Error rendering widget '{widget_name}': {e}")
-                import traceback
-                traceback.print_exc()
-                return None
+            return {
+                "type": widget_name,
+                "version": widget_def.get('version', '1.0'),
+                "data": rendered
+            }
+        except (UndefinedError, ValueError) as e:
+            # Expected data/schema mismatches: no stack formatting on the response path
+            logger.warning("❌ Error rendering widget '%s': %s", widget_name, e)
+            return None
+        except Exception:
+            logger.exception("❌ Error rendering widget '%s'", widget_name, extra={"widget": widget_name})
+            return None
     
-    def get_available_widgets(self) -> list:
-        """Get list of available widget templates."""
-        return list(self._templates.keys())
+    def get_available_widgets(self) -> Tuple[str, ...]:
+        """Get the names of available widget templates (shared, immutable)."""
+        return self._widget_names
     
     def get_widget_schema(self, widget_name: str) -> Optional[Dict[str, Any]]:
         """Get the JSON schema for a widget's expected data format."""
-        with self._lock:
-            if widget_name in self._templates:
-                return self._templates[widget_name].get('jsonSchema')
+        widget_def = self._templates.get(widget_name)
+        if widget_def is not None:
+            return widget_def.get('jsonSchema')
         return None
 
 
@@ -95,6 +188,10 @@ _widget_manager_lock = threading.Lock()
 def get_widget_manager() -> WidgetManager:
     """Get or create the global widget manager instance."""
     global _widget_manager
+    # Lock-free once built; the lock only guards the one-time construction
+    manager = _widget_manager
+    if manager is not None:
+        return manager
     with _widget_manager_lock:
         if _widget_manager is None:
             _widget_manager = WidgetManager()
@@ -1,7 +1,10 @@
-import json
+import threading
 from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping
+
+import json_utils
 
 
 class FeedbackAnalytics:
@@ -13,71 +16,93 @@ class FeedbackAnalytics:
     def __init__(self, log_path: str = "logs/feedback.log"):
         self.log_path = Path(log_path)
         self._last_mtime = None
-        self._summary: Dict[str, Any] = {
-            "plan_confirmed": 0,
-            "plan_declined": 0,
-            "partial_requests": {},
-            "scope_preferences": {},
-            "total_events": 0,
-        }
+        self._last_size = None
+        # Byte offset just past the last complete line folded into the counters
+        self._last_offset = 0
+        # Counters are advanced in place from _last_offset, so two refreshes
+        # running at once would count the same appended lines twice
+        self._lock = threading.Lock()
+        self._reset_counters()
+        self._summary: Mapping[str, Any] = self._build_summary()
         self.refresh(force=True)
 
+    def _reset_counters(self):
+        self._plan_confirmed = 0
+        self._plan_declined = 0
+        self._partial_counter: Counter = Counter()
+        self._scope_counter: Counter = Counter()
+        self._total = 0
+        self._last_offset = 0
+
+    def _build_summary(self) -> Mapping[str, Any]:
+        """Read-only snapshot, built only when a refresh changes the counters."""
+        return MappingProxyType({
+            "plan_confirmed": self._plan_confirmed,
+            "plan_declined": self._plan_declined,
+            "partial_requests": MappingProxyType(dict(self._partial_counter)),
+            "scope_preferences": MappingProxyType(dict(self._scope_counter)),
+            "total_events": self._total,
+        })
+
     def refresh(self, force: bool = False):
+        with self._lock:
+            self._refresh_locked(force)
+
+    def _refresh_locked(self, force: bool):
         if not self.log_path.exists():
             if force:
-                self._summary = {
-                    "plan_confirmed": 0,
-                    "plan_declined": 0,
-                    "partial_requests": {},
-                    "scope_preferences": {},
-                    "total_events": 0,
-                }
+                self._reset_counters()
+                self._summary = self._build_summary()
             return
 
-        mtime = self.log_path.stat().st_mtime
-        if not force and self._last_mtime == mtime:
+        stat = self.log_path.stat()
+        mtime, size = stat.st_mtime, stat.st_size
+        if not force and self._last_mtime == mtime and self._last_size == size:
             return
 
-        plan_confirmed = 0
-        plan_declined = 0
-        partial_counter = Counter()
-        scope_counter = Counter()
-        total = 0
-
-        with self.log_path.open("r", encoding="utf-8") as fh:
-            for line in fh:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                payload = event.get("payload") or {}
-                evt = event.get("event")
-                total += 1
-                if evt == "plan_confirmed":
-                    plan_confirmed += 1
-                elif evt == "plan_declined":
-                    plan_declined += 1
-                elif evt == "partial_plan":
-                    partial_counter[payload.get("offer", "unknown")] += 1
-                elif evt == "plan_scope":
-                    for domain in payload.get("scope") or []:
-                        scope_counter[domain] += 1
-                elif evt == "plan_scope_expanded":
-                    for domain in payload.get("added") or []:
-                        scope_counter[domain] += 1
-
-        self._summary = {
-            "plan_confirmed": plan_confirmed,
-            "plan_declined": plan_declined,
-            "partial_requests": dict(partial_counter),
-            "scope_preferences": dict(scope_counter),
-            "total_events": total,
-        }
+        # The log is append-only; a shrink means it was rotated or truncated
+        if force or size < self._last_offset:
+            self._reset_counters()
+
+        # Only the bytes appended since the last refresh are parsed
+        with self.log_path.open("rb") as fh:
+            fh.seek(self._last_offset)
+            chunk = fh.read()
+
+        # A trailing line without its newline is still being written; pick it up next time
+        end = chunk.rfind(b"\n") + 1
+        # Bucket the new events by type, then fold each bucket in with one
+        # C-level Counter.update instead of per-event increments
+        buckets = defaultdict(list)
+        for line in chunk[:end].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json_utils.loads(line)
+            except ValueError:
+                continue
+            buckets[event.get("event")].append(event.get("payload") or {})
+            self._total += 1
+
+        self._plan_confirmed += len(buckets.get("plan_confirmed", ()))
+        self._plan_declined += len(buckets.get("plan_declined", ()))
+        self._partial_counter.update(
+            payload.get("offer", "unknown") for payload in buckets.get("partial_plan", ())
+        )
+        self._scope_counter.update(
+            domain for payload in buckets.get("plan_scope", ()) for domain in payload.get("scope") or []
+        )
+        self._scope_counter.update(
+            domain for payload in buckets.get("plan_scope_expanded", ()) for domain in payload.get("added") or []
+        )
+
+        self._last_offset += end
+        self._summary = self._build_summary()
         self._last_mtime = mtime
+        self._last_size = size
 
-    def get_summary(self) -> Dict[str, Any]:
-        return self._summary.copy()
+    def get_summary(self) -> Mapping[str, Any]:
+        """Return the current read-only summary; copy it before mutating."""
+        return self._summary
 
@@ -1,11 +1,13 @@
-import requests
-import json
+import asyncio
+import httpx
 import time
 import sys
 
+from sse_client import CLIENT_OPTIONS, iter_sse_data
+
 BASE_URL = "http://127.0.0.1:5000/api/chat"
 
-def run_turn(turn_name, message, session_id=None):
+async def run_turn(client, turn_name, message, session_id=None):
     print(f"\n=== {turn_name} ===")
     print(f"User: {message}")
     payload = {"message": message}
@@ -16,22 +18,18 @@ def run_turn(turn_name, message, session_id=None):
     response_content = ""
     
     try:
-        with requests.post(BASE_URL, json=payload, stream=True) as r:
+        async with client.stream("POST", BASE_URL, json=payload) as r:
             r.raise_for_status()
-            for line in r.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith("data: "):
-                        data = json.loads(decoded_line[6:])
-                        if data['type'] == 'session':
-                            session_id = data['session_id']
-                        elif data['type'] == 'final':
-                            response_content = data['content']
-                        elif data['type'] == 'agent':
-                            sys.stdout.write(f"[{data['name']}] ")
-                            sys.stdout.flush()
-                        elif data['type'] == 'widget':
-                            print(f"\n[Widget]: {data['widget']}")
+            async for data in iter_sse_data(r):
+                if data['type'] == 'session':
+                    session_id = data['session_id']
+                elif data['type'] == 'final':
+                    response_content = data['content']
+                elif data['type'] == 'agent':
+                    sys.stdout.write(f"[{data['name']}] ")
+                    sys.stdout.flush()
+                elif data['type'] == 'widget':
+                    print(f"\n[Widget]: {data['widget']}")
                             
     except Exception as e:
         print(f"Error: {e}")
@@ -44,23 +42,26 @@ def run_turn(turn_name, message, session_id=None):
     
     return session_id
 
-def run_critique_session():
+async def run_critique_session(client):
     # Turn 1: Vague complaint
-    session_id = run_turn("Turn 1: Ambiguity", "I've been feeling really low energy lately.")
-    time.sleep(1)
+    session_id = await run_turn(client, "Turn 1: Ambiguity", "I've been feeling really low energy lately.")
     
     # Turn 2: Data inquiry
-    session_id = run_turn("Turn 2: Data Context", "Does my blood work explain why?", session_id)
-    time.sleep(1)
+    session_id = await run_turn(client, "Turn 2: Data Context", "Does my blood work explain why?", session_id)
     
     # Turn 3: Mixed Intent/Constraint
-    session_id = run_turn("Turn 3: Constraint", "Okay, I want to fix it. Give me a plan, but no supplements please, I hate swallowing pills.", session_id)
-    time.sleep(1)
+    session_id = await run_turn(client, "Turn 3: Constraint", "Okay, I want to fix it. Give me a plan, but no supplements please, I hate swallowing pills.", session_id)
     
     # Turn 4: Dynamic Pivot
-    session_id = run_turn("Turn 4: Pivot", "Actually, wait. Just give me a meal plan for now.", session_id)
+    session_id = await run_turn(client, "Turn 4: Pivot", "Actually, wait. Just give me a meal plan for now.", session_id)
+
+async def run_many(n=1):
+    """Run n critique sessions concurrently over one client (turns within a session stay ordered)."""
+    async with httpx.AsyncClient(**CLIENT_OPTIONS) as client:
+        await asyncio.gather(*(run_critique_session(client) for _ in range(n)))
 
 if __name__ == "__main__":
     # Ensure server is running (assuming user has it running based on context)
-    run_critique_session()
-
+    # Optional argument: number of concurrent sessions (default 1)
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    asyncio.run(run_many(sessions))
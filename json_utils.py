@@ -0,0 +1,26 @@
+"""JSON encoding and decoding via orjson when it is installed, stdlib json otherwise."""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json handles the same documents
+    orjson = None
+
+
+def loads(data):
+    """Parse JSON from bytes, bytearray, memoryview or str. Raises ValueError on bad input."""
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj, default=None) -> bytes:
+    """Serialize to UTF-8 JSON bytes. Non-str dict keys and numpy values are accepted."""
+    if orjson:
+        return orjson.dumps(
+            obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj, default=default, ensure_ascii=False).encode()
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 from agent_system.orchestration import Orchestrator
@@ -6,6 +7,11 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Orchestrator tracing is logged at DEBUG; set MESH_DEBUG=1 to see it
+logging.basicConfig(level=logging.WARNING)
+if os.environ.get("MESH_DEBUG"):
+    logging.getLogger("agent_system").setLevel(logging.DEBUG)
+
 def main():
     if not os.environ.get("GOOGLE_API_KEY"):
         print("Error: GOOGLE_API_KEY not found in environment.")
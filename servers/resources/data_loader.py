@@ -1,84 +1,200 @@
-import json
+import heapq
+import inspect
+import logging
 import os
+from operator import itemgetter
+import json_utils
 import lancedb
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+# stdout carries the MCP JSON-RPC stream; diagnostics go to stderr via logging
+logger = logging.getLogger(__name__)
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 LANCEDB_URI = os.path.join(DATA_DIR, "lancedb")
 
+# filename -> (mtime, parsed data); callers treat the data as read-only
+_JSON_CACHE: Dict[str, Tuple[float, Any]] = {}
+
 def load_json(filename: str) -> Any:
     path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
         return {}
-    with open(path, 'r') as f:
-        return json.load(f)
+    cached = _JSON_CACHE.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json_utils.loads(raw)
+    _JSON_CACHE[filename] = (mtime, data)
+    return data
 
-def get_biomarker_ranges(biomarker_name: str) -> Optional[Dict[str, Any]]:
-    ranges = load_json("ranges.json")
-    # Case insensitive search
+# filename -> (source data, lookup structures derived from it)
+_INDEX_CACHE: Dict[str, Tuple[Any, Any]] = {}
+
+def _get_index(filename: str, build: Callable[[Any], Any]) -> Any:
+    """Return lookup structures for a data file, rebuilt only when the file reloads."""
+    data = load_json(filename)
+    cached = _INDEX_CACHE.get(filename)
+    if cached and cached[0] is data:
+        return cached[1]
+    index = build(data)
+    _INDEX_CACHE[filename] = (data, index)
+    return index
+
+def _build_record_index(records: List[Dict[str, Any]], *fields: str):
+    """Exact lowercase-name lookup plus pre-lowered rows for substring matching."""
+    by_name_lower = {}
+    rows = []
+    for rec in records:
+        lowered = tuple(str(rec.get(field, '')).lower() for field in fields)
+        by_name_lower.setdefault(lowered[0], rec)
+        rows.append((lowered, rec))
+    return by_name_lower, tuple(rows)
+
+def _build_range_index(ranges: Dict[str, Any]):
+    by_name_lower = {}
+    rows = []
     for name, data in ranges.items():
-        if biomarker_name.lower() in name.lower():
-            return {name: data}
-    return None
+        lower_name = name.lower()
+        by_name_lower.setdefault(lower_name, (name, data))
+        rows.append((lower_name, (name, data)))
+    return by_name_lower, tuple(rows)
+
+def get_biomarker_ranges(biomarker_name: str) -> Optional[Dict[str, Any]]:
+    by_name_lower, rows = _get_index("ranges.json", _build_range_index)
+    # Case insensitive search: exact name first, then substring
+    query = biomarker_name.lower()
+    hit = by_name_lower.get(query)
+    if hit is None:
+        hit = next((item for lower_name, item in rows if query in lower_name), None)
+    if hit is None:
+        return None
+    name, data = hit
+    return {name: data}
 
 def get_workout_plan(goal: str) -> List[Dict[str, Any]]:
-    workouts = load_json("workouts.json")
+    _, rows = _get_index("workouts.json", lambda data: _build_record_index(data, 'name', 'difficulty'))
     # Filter by name or difficulty matching the goal string roughly
-    results = []
-    for w in workouts:
-        if goal.lower() in w['name'].lower() or goal.lower() in w['difficulty'].lower():
-            results.append(w)
-    return results
+    query = goal.lower()
+    return [w for (lower_name, lower_difficulty), w in rows if query in lower_name or query in lower_difficulty]
 
 def get_supplement_info(name: str) -> Optional[Dict[str, Any]]:
-    supplements = load_json("supplements.json")
-    for s in supplements:
-        if name.lower() in s['name'].lower():
-            return s
-    return None
+    by_name_lower, rows = _get_index("supplements.json", lambda data: _build_record_index(data, 'name'))
+    query = name.lower()
+    hit = by_name_lower.get(query)
+    if hit is not None:
+        return hit
+    return next((s for (lower_name,), s in rows if query in lower_name), None)
 
 def get_meal_plan(plan_type: str) -> Optional[Dict[str, Any]]:
     """Get meal plan by type (e.g., 'cholesterol', 'energy', 'muscle')."""
-    meal_plans = load_json("meals.json")
-    for plan in meal_plans:
-        if plan_type.lower() in plan['name'].lower() or plan_type.lower() in plan['id'].lower():
+    _, rows = _get_index("meals.json", lambda data: _build_record_index(data, 'name', 'id'))
+    query = plan_type.lower()
+    for (lower_name, lower_id), plan in rows:
+        if query in lower_name or query in lower_id:
             return plan
     # Return first plan as default if no match
-    return meal_plans[0] if meal_plans else None
+    return rows[0][1] if rows else None
+
+# Knowledge-base table is opened once per process; FTS availability is settled
+# by ensure_fts_index() at server start (None = not checked, scan only)
+_kb_table = None
+_kb_fts_ready: Optional[bool] = None
+
+def _open_knowledge_base():
+    global _kb_table
+    if _kb_table is None:
+        db = lancedb.connect(LANCEDB_URI)
+        _kb_table = db.open_table("knowledge_base")
+    return _kb_table
+
+def _fts_search(tbl, query: str) -> List[Dict[str, Any]]:
+    rows = tbl.search(query, query_type="fts").limit(5).to_list()
+    return [{k: v for k, v in row.items() if k != "_score"} for row in rows]
+
+# (table version, [(doc, lowered "title content")]) for the keyword-scan fallback
+_kb_scan_index: Optional[Tuple[Any, List[Tuple[Dict[str, Any], str]]]] = None
+
+def _get_scan_index(tbl) -> List[Tuple[Dict[str, Any], str]]:
+    """Docs paired with their lowercased search text, rebuilt when the table version changes."""
+    global _kb_scan_index
+    version = getattr(tbl, "version", None)
+    if _kb_scan_index is None or _kb_scan_index[0] != version:
+        all_docs = tbl.to_pandas().to_dict('records')
+        _kb_scan_index = (version, [
+            (doc, (doc['title'] + " " + doc['content']).lower()) for doc in all_docs
+        ])
+    return _kb_scan_index[1]
+
+def _scan_search(tbl, query: str) -> List[Dict[str, Any]]:
+    """Keyword scan over the whole table; used when no FTS index can be built."""
+    results = []
+    keywords = query.lower().split()
+    for doc, text in _get_scan_index(tbl):
+        score = sum(1 for kw in keywords if kw in text)
+        if score > 0:
+            results.append((score, doc))
+    
+    # Top 5 by simple score; nlargest is stable, so ties keep table order
+    return [doc for _, doc in heapq.nlargest(5, results, key=itemgetter(0))]
+
+def ensure_fts_index() -> bool:
+    """
+    Make sure the knowledge base has a full-text index over title/content.
+    
+    Call once at server start, before any request can search: building the
+    index writes into the data directory and must not race concurrent queries.
+    Returns whether FTS is usable; when it isn't, searches use the keyword scan.
+    """
+    global _kb_fts_ready
+    try:
+        tbl = _open_knowledge_base()
+    except Exception as e:
+        logger.warning("Knowledge base unavailable: %s", e)
+        _kb_fts_ready = False
+        return False
+    try:
+        _fts_search(tbl, "health")
+        _kb_fts_ready = True
+        return True
+    except Exception:
+        pass  # no index yet
+    
+    kwargs = {"replace": True}
+    # LanceDB releases that default to the native FTS index only take a single
+    # column; the tantivy-backed index is the one that accepts a field list
+    if "use_tantivy" in inspect.signature(tbl.create_fts_index).parameters:
+        kwargs["use_tantivy"] = True
+    try:
+        tbl.create_fts_index(["title", "content"], **kwargs)
+        _fts_search(tbl, "health")
+        _kb_fts_ready = True
+    except Exception as e:
+        logger.warning(
+            "LanceDB %s could not build a full-text index; knowledge-base searches "
+            "will use the keyword scan: %s", getattr(lancedb, "__version__", "unknown"), e,
+        )
+        _kb_fts_ready = False
+    return _kb_fts_ready
 
 def search_knowledge_base(query: str) -> List[Dict[str, Any]]:
     """
     Searches the LanceDB knowledge base.
-    Since we didn't generate embeddings in the generation script (to keep it simple/fast),
-    we will do a full text search if possible, or just a simple scan.
-    
-    LanceDB's full text search requires an index which we didn't build.
-    For this prototype, we will load the table and do a python-side filter.
-    In a real SOTA system, we would use `tbl.search(query).limit(5).to_list()`.
+    Uses LanceDB's native full-text search over title/content when
+    ensure_fts_index() found or built an index; otherwise falls back to a
+    keyword scan.
     """
     try:
-        db = lancedb.connect(LANCEDB_URI)
-        tbl = db.open_table("knowledge_base")
-        
-        # Mock semantic search by simple keyword matching for this prototype
-        # Real implementation would use embeddings.
-        all_docs = tbl.to_pandas().to_dict('records')
-        
-        results = []
-        keywords = query.lower().split()
-        for doc in all_docs:
-            score = 0
-            text = (doc['title'] + " " + doc['content']).lower()
-            for kw in keywords:
-                if kw in text:
-                    score += 1
-            if score > 0:
-                results.append(doc)
-        
-        # Sort by simple score
-        results.sort(key=lambda x: sum(1 for kw in keywords if kw in (x['title'] + " " + x['content']).lower()), reverse=True)
-        return results[:5]
-        
+        tbl = _open_knowledge_base()
+        if _kb_fts_ready:
+            try:
+                return _fts_search(tbl, query)
+            except Exception:
+                pass  # e.g. FTS query syntax; scan instead
+        return _scan_search(tbl, query)
     except Exception as e:
-        print(f"Error searching LanceDB: {e}")
+        logger.warning("Error searching LanceDB: %s", e)
         return []
@@ -1,13 +1,24 @@
 from mcp.server.fastmcp import FastMCP
 from typing import List, Optional
-import data_loader
-import logging
 from datetime import datetime
+import logging
+import os
+import sys
+
+# Servers run as scripts; make the project's shared modules importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import data_loader  # noqa: E402
+import json_utils  # noqa: E402
 
 # Suppress verbose MCP logging
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger('mcp').setLevel(logging.WARNING)
 
+def _serialize(data) -> str:
+    """Return tool results as JSON text rather than a Python repr."""
+    return json_utils.dumps(data, default=str).decode()
+
 # Initialize FastMCP server
 mcp = FastMCP("resources")
 
@@ -22,7 +33,7 @@ def get_biomarker_ranges(biomarker_name: str) -> str:
     data = data_loader.get_biomarker_ranges(biomarker_name)
     if not data:
         return f"No reference ranges found for {biomarker_name}."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_workout_plan(goal: str) -> str:
@@ -35,7 +46,7 @@ def get_workout_plan(goal: str) -> str:
     data = data_loader.get_workout_plan(goal)
     if not data:
         return f"No workout plans found matching '{goal}'."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_supplement_info(name: str) -> str:
@@ -48,7 +59,7 @@ def get_supplement_info(name: str) -> str:
     data = data_loader.get_supplement_info(name)
     if not data:
         return f"No information found for supplement '{name}'."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def search_knowledge_base(query: str) -> str:
@@ -61,8 +72,10 @@ def search_knowledge_base(query: str) -> str:
     data = data_loader.search_knowledge_base(query)
     if not data:
         return f"No relevant articles or videos found for '{query}'."
-    return str(data)
+    return _serialize(data)
 
 if __name__ == "__main__":
+    # Settle the knowledge-base index before serving, not inside a tool call
+    data_loader.ensure_fts_index()
     mcp.run()
 
@@ -1,48 +1,91 @@
-import json
+import bisect
 import os
-from typing import List, Dict, Any, Optional
+from operator import itemgetter
+import json_utils
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 
+# filename -> (mtime, parsed data); callers treat the data as read-only
+_JSON_CACHE: Dict[str, Tuple[float, Any]] = {}
+
 def load_json(filename: str) -> Any:
     path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
         return []
-    with open(path, 'r') as f:
-        return json.load(f)
+    cached = _JSON_CACHE.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json_utils.loads(raw)
+    _JSON_CACHE[filename] = (mtime, data)
+    return data
+
+# filename -> (source data, lookup structures derived from it)
+_INDEX_CACHE: Dict[str, Tuple[Any, Any]] = {}
+
+def _get_index(filename: str, build: Callable[[Any], Any]) -> Any:
+    """Return lookup structures for a data file, rebuilt only when the file reloads."""
+    data = load_json(filename)
+    cached = _INDEX_CACHE.get(filename)
+    if cached and cached[0] is data:
+        return cached[1]
+    index = build(data)
+    _INDEX_CACHE[filename] = (data, index)
+    return index
+
+def _build_biomarker_index(biomarkers: List[Dict[str, Any]]):
+    """The records with their lowered names and, for every known name, the indices of all names containing it."""
+    lowered = tuple(b['name'].lower() for b in biomarkers)
+    # Substring matches for full-name queries are precomputed, so the common
+    # case of asking for a biomarker by its exact name is a dict lookup
+    matches_by_name = {
+        name: tuple(i for i, other in enumerate(lowered) if name in other)
+        for name in set(lowered)
+    }
+    return biomarkers, lowered, matches_by_name
 
 def get_biomarkers(names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-    all_biomarkers = load_json("biomarkers.json")
     if not names:
-        return all_biomarkers
+        return load_json("biomarkers.json")
     
-    # Case-insensitive partial match
-    results = []
-    for b in all_biomarkers:
-        for name in names:
-            if name.lower() in b['name'].lower():
-                results.append(b)
-                break
-    return results
+    # Case-insensitive partial match; indices refer to the records the index was built from
+    all_biomarkers, lowered, matches_by_name = _get_index("biomarkers.json", _build_biomarker_index)
+    wanted = set()
+    for name in names:
+        query = name.lower()
+        matches = matches_by_name.get(query)
+        if matches is None:
+            matches = (i for i, other in enumerate(lowered) if query in other)
+        wanted.update(matches)
+    return [all_biomarkers[i] for i in sorted(wanted)]
+
+def _build_date_range_index(log: List[Dict[str, Any]]):
+    """Entries sorted by date plus the parallel list of dates for bisecting."""
+    entries = sorted(log, key=itemgetter('date'))
+    return [entry['date'] for entry in entries], entries
+
+def _build_date_index(log: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    by_date = {}
+    for entry in log:
+        by_date.setdefault(entry['date'], entry)
+    return by_date
 
 def get_activity_log(start_date: str, end_date: str) -> List[Dict[str, Any]]:
-    log = load_json("activity.json")
-    # Simple string comparison for ISO dates works
-    return [entry for entry in log if start_date <= entry['date'] <= end_date]
+    dates, entries = _get_index("activity.json", _build_date_range_index)
+    # ISO dates sort lexically, so the range is a contiguous slice
+    lo = bisect.bisect_left(dates, start_date)
+    hi = bisect.bisect_right(dates, end_date)
+    return entries[lo:hi]
 
 def get_food_journal(date: str) -> Optional[Dict[str, Any]]:
-    log = load_json("food_journal.json")
-    for entry in log:
-        if entry['date'] == date:
-            return entry
-    return None
+    return _get_index("food_journal.json", _build_date_index).get(date)
 
 def get_sleep_data(date: str) -> Optional[Dict[str, Any]]:
-    log = load_json("sleep.json")
-    for entry in log:
-        if entry['date'] == date:
-            return entry
-    return None
+    return _get_index("sleep.json", _build_date_index).get(date)
 
 def get_user_profile() -> Optional[Dict[str, Any]]:
     return load_json("profile.json")
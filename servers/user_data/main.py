@@ -1,12 +1,23 @@
 from mcp.server.fastmcp import FastMCP
 from typing import List, Optional
-import data_loader
 import logging
+import os
+import sys
+
+# Servers run as scripts; make the project's shared modules importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import data_loader  # noqa: E402
+import json_utils  # noqa: E402
 
 # Suppress verbose MCP logging
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger('mcp').setLevel(logging.WARNING)
 
+def _serialize(data) -> str:
+    """Return tool results as JSON text rather than a Python repr."""
+    return json_utils.dumps(data, default=str).decode()
+
 # Initialize FastMCP server
 mcp = FastMCP("user_data")
 
@@ -22,7 +33,7 @@ def get_biomarkers(names: Optional[List[str]] = None) -> str:
     data = data_loader.get_biomarkers(names)
     if not data:
         return "No biomarkers found matching the criteria."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_activity_log(start_date: str, end_date: str) -> str:
@@ -36,7 +47,7 @@ def get_activity_log(start_date: str, end_date: str) -> str:
     data = data_loader.get_activity_log(start_date, end_date)
     if not data:
         return f"No activity data found between {start_date} and {end_date}."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_food_journal(date: str) -> str:
@@ -49,7 +60,7 @@ def get_food_journal(date: str) -> str:
     data = data_loader.get_food_journal(date)
     if not data:
         return f"No food journal entry found for {date}."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_sleep_data(date: str) -> str:
@@ -62,7 +73,7 @@ def get_sleep_data(date: str) -> str:
     data = data_loader.get_sleep_data(date)
     if not data:
         return f"No sleep data found for {date}."
-    return str(data)
+    return _serialize(data)
 
 @mcp.tool()
 def get_user_profile() -> str:
@@ -72,7 +83,7 @@ def get_user_profile() -> str:
     data = data_loader.get_user_profile()
     if not data:
         return "No user profile found."
-    return str(data)
+    return _serialize(data)
 
 if __name__ == "__main__":
     mcp.run()
@@ -0,0 +1,37 @@
+"""Shared httpx settings and SSE parsing for the conversation scripts."""
+
+import importlib.util
+
+import json_utils
+
+# One pooled client per run keeps connections alive across turns and sessions.
+# HTTP/2 multiplexing needs the optional h2 package; SSE must not be compressed.
+CLIENT_OPTIONS = {
+    "timeout": None,
+    "http2": importlib.util.find_spec("h2") is not None,
+    "headers": {"Accept-Encoding": "identity"},
+}
+
+PREFIX = b"data: "
+PREFIX_LEN = len(PREFIX)
+
+
+async def iter_sse_data(response, skip_malformed: bool = False):
+    """Yield parsed `data:` payloads from an SSE response without decoding each line to str.
+
+    With skip_malformed, payloads that aren't valid JSON are dropped instead of raising.
+    """
+    buffer = b""
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.startswith(PREFIX):
+                continue
+            try:
+                data = json_utils.loads(memoryview(line)[PREFIX_LEN:])
+            except ValueError:
+                if skip_malformed:
+                    continue
+                raise
+            yield data
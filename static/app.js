@@ -384,10 +384,11 @@ chatForm.addEventListener('submit', async (e) => {
                     } else if (data.type === 'final') {
                         removeTypingIndicator();
                         if (data.content) {
-                            if (currentMessageElement && !hasStreamContent) {
-                                currentMessageMarkdown += data.content;
+                            // The finalized reply supersedes the streamed draft
+                            if (currentMessageElement) {
+                                currentMessageMarkdown = data.content;
                                 currentMessageElement.innerHTML = renderMarkdown(currentMessageMarkdown);
-                            } else if (!currentMessageElement) {
+                            } else {
                                 currentMessageMarkdown = data.content;
                                 addMessage(data.content);
                             }
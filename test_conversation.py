@@ -3,13 +3,15 @@
 Multi-turn conversation test for the simplified agent system.
 """
 
-import requests
-import json
-import time
+import asyncio
+import httpx
+import sys
+
+from sse_client import CLIENT_OPTIONS, iter_sse_data
 
 BASE_URL = "http://localhost:5000"
 
-def chat(message: str, session_id: str = None) -> tuple[str, str]:
+async def chat(client: httpx.AsyncClient, message: str, session_id: str = None) -> tuple[str, str]:
     """Send a chat message and return (response, session_id)."""
     payload = {"message": message}
     if session_id:
@@ -19,43 +21,31 @@ def chat(message: str, session_id: str = None) -> tuple[str, str]:
     print(f"👤 USER: {message}")
     print(f"{'='*60}")
     
-    response = requests.post(
-        f"{BASE_URL}/api/chat",
-        json=payload,
-        stream=True
-    )
-    
     full_response = ""
     new_session_id = session_id
     widgets = []
     
-    for line in response.iter_lines():
-        if line:
-            line = line.decode('utf-8')
-            if line.startswith('data: '):
-                try:
-                    data = json.loads(line[6:])
-                    if data['type'] == 'agent':
-                        print(f"  🤖 Agent: {data['name']}")
-                    elif data['type'] == 'stream':
-                        pass  # Streaming text
-                    elif data['type'] == 'final':
-                        if isinstance(data.get('content'), dict):
-                            full_response = data['content'].get('response', '')
-                            new_session_id = data['content'].get('session_id', session_id)
-                        else:
-                            full_response = data.get('content', '')
-                        if data.get('session_id'):
-                            new_session_id = data['session_id']
-                    elif data['type'] == 'session':
-                        new_session_id = data.get('session_id', session_id)
-                    elif data['type'] == 'widget':
-                        widgets.append(data['widget'])
-                        print(f"  📦 Widget: {data['widget']}")
-                    elif data['type'] == 'done':
-                        break
-                except json.JSONDecodeError:
-                    pass
+    async with client.stream("POST", f"{BASE_URL}/api/chat", json=payload) as response:
+        async for data in iter_sse_data(response, skip_malformed=True):
+            if data['type'] == 'agent':
+                print(f"  🤖 Agent: {data['name']}")
+            elif data['type'] == 'stream':
+                pass  # Streaming text
+            elif data['type'] == 'final':
+                if isinstance(data.get('content'), dict):
+                    full_response = data['content'].get('response', '')
+                    new_session_id = data['content'].get('session_id', session_id)
+                else:
+                    full_response = data.get('content', '')
+                if data.get('session_id'):
+                    new_session_id = data['session_id']
+            elif data['type'] == 'session':
+                new_session_id = data.get('session_id', session_id)
+            elif data['type'] == 'widget':
+                widgets.append(data['widget'])
+                print(f"  📦 Widget: {data['widget']}")
+            elif data['type'] == 'done':
+                break
     
     # Print response (truncated for readability)
     if full_response:
@@ -68,7 +58,7 @@ def chat(message: str, session_id: str = None) -> tuple[str, str]:
     return full_response, new_session_id
 
 
-def run_test():
+async def run_test(client: httpx.AsyncClient):
     print("\n" + "="*70)
     print("🧪 MULTI-TURN CONVERSATION TEST")
     print("="*70)
@@ -77,29 +67,31 @@ def run_test():
     
     # Turn 1: Ask a direct question
     print("\n\n📍 TURN 1: Direct question (should get direct answer)")
-    response, session_id = chat("What are my biggest health issues?", session_id)
-    time.sleep(1)
+    response, session_id = await chat(client, "What are my biggest health issues?", session_id)
     
     # Turn 2: Follow-up question
     print("\n\n📍 TURN 2: Follow-up question")
-    response, session_id = chat("Why is my cholesterol high?", session_id)
-    time.sleep(1)
+    response, session_id = await chat(client, "Why is my cholesterol high?", session_id)
     
     # Turn 3: Ask for a plan
     print("\n\n📍 TURN 3: Request a plan")
-    response, session_id = chat("Can you give me a plan to fix this?", session_id)
-    time.sleep(1)
+    response, session_id = await chat(client, "Can you give me a plan to fix this?", session_id)
     
     # Turn 4: Narrow the scope
     print("\n\n📍 TURN 4: Narrow the scope")
-    response, session_id = chat("Just focus on the diet part", session_id)
-    time.sleep(1)
+    response, session_id = await chat(client, "Just focus on the diet part", session_id)
     
     print("\n\n" + "="*70)
     print("✅ TEST COMPLETE")
     print("="*70)
 
 
-if __name__ == "__main__":
-    run_test()
+async def run_many(n: int = 1):
+    """Run n conversations concurrently over one client."""
+    async with httpx.AsyncClient(**CLIENT_OPTIONS) as client:
+        await asyncio.gather(*(run_test(client) for _ in range(n)))
 
+
+if __name__ == "__main__":
+    # Optional argument: number of concurrent conversations (default 1)
+    asyncio.run(run_many(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
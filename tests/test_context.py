@@ -20,3 +20,27 @@ def test_tool_cache_clears_on_data_version_increment():
 
     assert ctx.tool_cache == {}, "tool cache should clear after data version bump"
 
+
+
+def test_plan_completion_findings_clear_pending_domains():
+    ctx = AgentContext(user_intent="test")
+    ctx.register_plan_request("Conversation Planner", ["Nutritionist", "Sleep Doctor"])
+    assert ctx.get_pending_plan_domains() == ["nutrition", "sleep"]
+
+    ctx.add_finding("[Nutritionist]: Completed: Nutrition Plan for LDL")
+
+    assert ctx.plan_domain_flags["nutrition"]
+    assert not ctx.plan_domain_flags["sleep"]
+    assert ctx.get_pending_plan_domains() == ["sleep"]
+
+
+def test_sync_data_version_only_clears_stale_contexts():
+    ctx = AgentContext(user_intent="test")
+    ctx.cache_tool_result("get_biomarkers", {}, "cached")
+
+    assert not ctx.sync_data_version(0)
+    assert ctx.tool_cache
+
+    assert ctx.sync_data_version(2)
+    assert ctx.data_version == 2
+    assert ctx.tool_cache == {}
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analytics.feedback_analytics import FeedbackAnalytics  # noqa: E402
+
+
+def _append(path, *events):
+    with path.open("a", encoding="utf-8") as fh:
+        for event, payload in events:
+            fh.write(json.dumps({"event": event, "payload": payload}) + "\n")
+
+
+def _bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+
+
+def test_refresh_folds_in_only_appended_lines(tmp_path):
+    log = tmp_path / "feedback.log"
+    _append(log, ("plan_confirmed", {}), ("plan_scope", {"scope": ["sleep", "fitness"]}))
+    analytics = FeedbackAnalytics(str(log))
+    assert analytics.get_summary()["total_events"] == 2
+
+    _append(log, ("plan_scope_expanded", {"added": ["sleep"]}), ("partial_plan", {"offer": "meal"}))
+    with log.open("a", encoding="utf-8") as fh:
+        fh.write('{"event": "plan_declined"')  # still being written
+    _bump_mtime(log)
+    analytics.refresh()
+
+    summary = analytics.get_summary()
+    assert summary["total_events"] == 4
+    assert summary["plan_declined"] == 0
+    assert summary["scope_preferences"] == {"sleep": 2, "fitness": 1}
+    assert summary["partial_requests"] == {"meal": 1}
+
+    with log.open("a", encoding="utf-8") as fh:
+        fh.write(', "payload": {}}\n')
+    _bump_mtime(log)
+    analytics.refresh()
+    assert analytics.get_summary()["plan_declined"] == 1
+
+
+def test_refresh_rescans_after_truncation(tmp_path):
+    log = tmp_path / "feedback.log"
+    _append(log, ("plan_confirmed", {}), ("plan_confirmed", {}))
+    analytics = FeedbackAnalytics(str(log))
+
+    log.write_text("")
+    _append(log, ("plan_declined", {}))
+    _bump_mtime(log)
+    analytics.refresh()
+
+    summary = analytics.get_summary()
+    assert summary["plan_confirmed"] == 0
+    assert summary["plan_declined"] == 1
+
+
+def test_summary_is_shared_read_only_snapshot(tmp_path):
+    log = tmp_path / "feedback.log"
+    _append(log, ("partial_plan", {"offer": "meal"}))
+    analytics = FeedbackAnalytics(str(log))
+
+    summary = analytics.get_summary()
+    assert analytics.get_summary() is summary
+    with pytest.raises(TypeError):
+        summary["partial_requests"]["meal"] = 5
+    assert analytics.get_summary()["partial_requests"] == {"meal": 1}
+
+
+def test_concurrent_refreshes_count_appended_lines_once(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    log = tmp_path / "feedback.log"
+    _append(log, ("plan_confirmed", {}))
+    analytics = FeedbackAnalytics(str(log))
+    _append(log, *[("plan_declined", {})] * 50)
+    _bump_mtime(log)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: analytics.refresh(), range(32)))
+
+    summary = analytics.get_summary()
+    assert summary["plan_declined"] == 50
+    assert summary["total_events"] == 51
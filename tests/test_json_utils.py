@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import json_utils  # noqa: E402
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_matches_with_and_without_orjson(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_utils, "orjson", None)
+    elif json_utils.orjson is None:
+        pytest.skip("orjson not installed")
+
+    encoded = json_utils.dumps({"name": "Vitamin D3", 1: "é"})
+    assert isinstance(encoded, bytes)
+    assert json_utils.loads(memoryview(encoded)) == {"name": "Vitamin D3", "1": "é"}
+    with pytest.raises(ValueError):
+        json_utils.loads(b"not json")
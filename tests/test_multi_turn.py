@@ -1,7 +1,12 @@
-import requests
-import json
-import time
+import asyncio
+import httpx
 import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sse_client import CLIENT_OPTIONS, iter_sse_data  # noqa: E402
 
 BASE_URL = "http://localhost:5000/api/chat"
 
@@ -10,37 +15,32 @@ def print_step(step_name):
     print(f"🔵 STEP: {step_name}")
     print(f"{'='*50}")
 
-def send_message(message, session_id=None):
+async def send_message(client, message, session_id=None):
     print(f"\n📤 Sending: {message}")
     payload = {"message": message}
     if session_id:
         payload["session_id"] = session_id
     
     try:
-        # Use stream=True to handle SSE, but for this test we just want the final output and session_id
+        # Stream the SSE response, but for this test we just want the final output and session_id
         # We'll collect lines until we see 'final'
-        with requests.post(BASE_URL, json=payload, stream=True) as r:
+        async with client.stream("POST", BASE_URL, json=payload) as r:
             r.raise_for_status()
             final_content = ""
             new_session_id = session_id
             
-            for line in r.iter_lines():
-                if line:
-                    decoded_line = line.decode('utf-8')
-                    if decoded_line.startswith('data: '):
-                        data = json.loads(decoded_line[6:])
-                        
-                        if data['type'] == 'stream':
-                            # print(data['content'], end='', flush=True)
-                            pass
-                        elif data['type'] == 'final':
-                            final_content = data['content']
-                            if 'session_id' in data:
-                                new_session_id = data['session_id']
-                        elif data['type'] == 'session':
-                            new_session_id = data['session_id']
-                        elif data['type'] == 'error':
-                            print(f"\n❌ Error: {data['message']}")
+            async for data in iter_sse_data(r):
+                if data['type'] == 'stream':
+                    # print(data['content'], end='', flush=True)
+                    pass
+                elif data['type'] == 'final':
+                    final_content = data['content']
+                    if 'session_id' in data:
+                        new_session_id = data['session_id']
+                elif data['type'] == 'session':
+                    new_session_id = data['session_id']
+                elif data['type'] == 'error':
+                    print(f"\n❌ Error: {data['message']}")
                             
             print(f"\n📥 Response: {final_content[:200]}... [truncated]")
             return new_session_id, final_content
@@ -49,36 +49,35 @@ def send_message(message, session_id=None):
         print(f"❌ Request failed: {e}")
         return session_id, ""
 
-def run_test():
+async def run_test(client):
     print("🚀 Starting Multi-Turn Interaction Test")
     
     # Turn 1: Initial Diagnosis
     print_step("1. Initial Diagnosis Query")
-    session_id, response = send_message("I've been feeling really tired lately and my joints hurt. Can you check my levels?")
+    session_id, response = await send_message(client, "I've been feeling really tired lately and my joints hurt. Can you check my levels?")
     if not session_id:
         print("❌ Failed to get session ID. Aborting.")
         return
 
-    time.sleep(2)
-
     # Turn 2: Confirmation of Comprehensive Plan
     print_step("2. Confirming the Plan")
-    session_id, response = send_message("That sounds concerning. Yes, please give me a plan to fix this.", session_id)
-
-    time.sleep(2)
+    session_id, response = await send_message(client, "That sounds concerning. Yes, please give me a plan to fix this.", session_id)
 
     # Turn 3: Narrowing Scope (Testing Dynamic Intelligence)
     print_step("3. Narrowing Scope to Nutrition Only")
-    session_id, response = send_message("Actually, I just want to focus on my diet for now. I'm too busy for exercise.", session_id)
+    session_id, response = await send_message(client, "Actually, I just want to focus on my diet for now. I'm too busy for exercise.", session_id)
 
-    time.sleep(2)
-    
     # Turn 4: Specific Question (Testing Context Retention)
     print_step("4. Specific Question about Nutrition")
-    session_id, response = send_message("Will eating more spinach help with the fatigue?", session_id)
+    session_id, response = await send_message(client, "Will eating more spinach help with the fatigue?", session_id)
 
     print("\n✅ Test Complete.")
 
-if __name__ == "__main__":
-    run_test()
+async def run_many(n=1):
+    """Run n interaction tests concurrently over one client."""
+    async with httpx.AsyncClient(**CLIENT_OPTIONS) as client:
+        await asyncio.gather(*(run_test(client) for _ in range(n)))
 
+if __name__ == "__main__":
+    # Optional argument: number of concurrent sessions (default 1)
+    asyncio.run(run_many(int(sys.argv[1]) if len(sys.argv) > 1 else 1))
@@ -0,0 +1,175 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from agent_system.models import AgentContext  # noqa: E402
+from agent_system.orchestration import Orchestrator  # noqa: E402
+
+
+def _build_orchestrator(tmp_path):
+    orchestrator = Orchestrator()
+    data_file = tmp_path / "biomarkers.json"
+    data_file.write_text("[]")
+    orchestrator._data_files_by_dir = {str(tmp_path): {data_file.name: str(data_file)}}
+    orchestrator._last_data_check = {}
+    orchestrator._init_data_tracking()
+    return orchestrator, data_file
+
+
+def test_data_change_bumps_generation_for_every_session(tmp_path):
+    orchestrator, data_file = _build_orchestrator(tmp_path)
+    first, second = AgentContext(user_intent="a"), AgentContext(user_intent="b")
+
+    assert not orchestrator._check_data_updates(first)
+
+    stat = data_file.stat()
+    os.utime(data_file, (stat.st_atime, stat.st_mtime + 10))
+    orchestrator._last_refresh_ns = 0
+
+    assert orchestrator._check_data_updates(first)
+    assert orchestrator._check_data_updates(second)
+    assert first.data_version == second.data_version == 1
+    orchestrator.close()
+
+
+def test_aborted_speculative_run_leaves_context_untouched():
+    import threading
+
+    orchestrator = Orchestrator()
+    ctx = AgentContext(user_intent="test")
+    abort_event = threading.Event()
+    abort_event.set()
+
+    assert orchestrator.agents["Physician"].run(ctx, abort_event) == []
+    assert ctx.trace == []
+    assert ctx.history == []
+    orchestrator.close()
+
+
+def test_run_agent_reuses_run_while_inputs_are_unchanged():
+    orchestrator = Orchestrator()
+    calls = []
+
+    class CountingAgent:
+        def run(self, context, abort_event=None, on_event=None):
+            calls.append(len(context.history))
+            return ["Critic"]
+
+    orchestrator.agents["Nutritionist"] = CountingAgent()
+    ctx = AgentContext(user_intent="test")
+    agent_runs = {}
+
+    first = orchestrator._run_agent("Nutritionist", ctx, agent_runs, inline=True)
+    again = orchestrator._run_agent("Nutritionist", ctx, agent_runs)
+    assert again is first and calls == [0]
+
+    ctx.add_message("model", "new info")
+    assert orchestrator._run_agent("Nutritionist", ctx, agent_runs).result() == ["Critic"]
+    assert calls == [0, 1]
+
+    # Findings, flags and plan domains feed routing too
+    ctx.add_finding("Nutrition: LDL elevated")
+    orchestrator._run_agent("Nutritionist", ctx, agent_runs, inline=True)
+    ctx.set_flag("plan_request_pending")
+    orchestrator._run_agent("Nutritionist", ctx, agent_runs, inline=True)
+    ctx.pending_plan_domains.append("nutrition")
+    orchestrator._run_agent("Nutritionist", ctx, agent_runs, inline=True)
+    assert len(calls) == 5
+    orchestrator.close()
+
+
+def test_only_the_critic_forwards_text_events():
+    orchestrator = Orchestrator()
+    events = []
+    on_event = lambda event_type, payload: events.append((event_type, payload))
+
+    orchestrator.agents["Critic"]._write_text_chunk("Hello", on_event=on_event)
+    orchestrator.agents["Physician"]._write_text_chunk("narration", on_event=on_event)
+    orchestrator.agents["Guardrail"]._write_text_chunk("internal", on_event=on_event)
+    assert events == [("stream", "Hello")]
+    orchestrator.close()
+
+
+def test_resolve_agent_names_substitutes_and_dedupes_in_order():
+    orchestrator = Orchestrator()
+    names = ["Nutritionist", "Unknown", "Nutritionist", "Missing", "Critic", "Sleep Doctor"]
+    assert orchestrator._resolve_agent_names(names) == ["Nutritionist", "Critic", "Sleep Doctor"]
+    orchestrator.close()
+
+
+def test_request_abort_reaches_speculative_runs(monkeypatch):
+    import threading
+
+    orchestrator = Orchestrator()
+    request_abort = threading.Event()
+    planner_started, planner_saw_abort = threading.Event(), threading.Event()
+
+    class DisconnectingGuardrail:
+        def run(self, context, abort_event=None, on_event=None):
+            planner_started.wait(timeout=5)
+            request_abort.set()  # client goes away while the Planner is mid-run
+            return ["Conversation Planner"]
+
+    class SlowPlanner:
+        def run(self, context, abort_event=None, on_event=None):
+            planner_started.set()
+            for _ in range(500):
+                if abort_event is not None and abort_event.is_set():
+                    planner_saw_abort.set()
+                    return []
+                threading.Event().wait(0.01)
+            return ["Critic"]
+
+    orchestrator.agents["Guardrail"] = DisconnectingGuardrail()
+    orchestrator.agents["Conversation Planner"] = SlowPlanner()
+    monkeypatch.setattr(orchestrator, "_update_state_for_turn", lambda context, user_input: None)
+    # Keep the real (networked) Physician out of speculation
+    orchestrator._physician_available = False
+
+    orchestrator.run_mesh("hi", abort_event=request_abort)
+    assert planner_saw_abort.is_set()
+    orchestrator.close()
+
+
+def test_failed_hop_still_waits_for_speculative_runs(monkeypatch):
+    import threading
+
+    import pytest
+
+    orchestrator = Orchestrator()
+    planner_started, planner_finished = threading.Event(), threading.Event()
+
+    class PassingGuardrail:
+        def run(self, context, abort_event=None, on_event=None):
+            planner_started.wait(timeout=5)
+            return ["Critic"]
+
+    class SlowPlanner:
+        def run(self, context, abort_event=None, on_event=None):
+            planner_started.set()
+            while not (abort_event is not None and abort_event.is_set()):
+                threading.Event().wait(0.01)
+            planner_finished.set()
+            return []
+
+    def failing_run_agent(*args, **kwargs):
+        raise RuntimeError("hop failed")
+
+    orchestrator.agents["Guardrail"] = PassingGuardrail()
+    orchestrator.agents["Conversation Planner"] = SlowPlanner()
+    monkeypatch.setattr(orchestrator, "_update_state_for_turn", lambda context, user_input: None)
+    # Keep the real (networked) Physician out of speculation
+    orchestrator._physician_available = False
+    monkeypatch.setattr(orchestrator, "_resolve_agent_names", lambda names: ["Critic"])
+    monkeypatch.setattr(orchestrator, "_run_agent", failing_run_agent)
+
+    with pytest.raises(RuntimeError):
+        orchestrator.run_mesh("hi")
+    # The speculative Planner was told to stop and had finished before run_mesh unwound
+    assert planner_finished.is_set()
+    orchestrator.close()
@@ -0,0 +1,42 @@
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from agent_system.session_manager import SessionManager  # noqa: E402
+
+
+def test_get_session_returns_same_context_until_timeout():
+    manager = SessionManager(session_timeout_minutes=60)
+    session_id = manager.create_session("hello")
+
+    context = manager.get_session(session_id)
+    assert manager.get_session(session_id) is context
+
+    _, _, timestamps, _ = manager._shard(session_id)
+    timestamps[session_id] -= 2 * 60 * 60
+    fresh = manager.get_session(session_id)
+    assert fresh is not context
+    assert fresh.history == []
+
+
+def test_get_session_creates_unknown_ids():
+    manager = SessionManager()
+    context = manager.get_session("client-supplied-id")
+    assert manager.get_session("client-supplied-id") is context
+    assert "client-supplied-id" in manager.list_sessions()
+
+
+def test_cleanup_sweeps_every_shard():
+    manager = SessionManager(session_timeout_minutes=1)
+    session_ids = [manager.create_session(str(i)) for i in range(64)]
+    for session_id in session_ids[::2]:
+        _, _, timestamps, _ = manager._shard(session_id)
+        timestamps[session_id] -= 120
+
+    manager._cleanup_old_sessions()
+    assert set(manager.list_sessions()) == set(session_ids[1::2])
@@ -0,0 +1,109 @@
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+import web_app  # noqa: E402
+
+
+class FakeOrchestrator:
+    def run_mesh(self, user_input, session_id=None, on_event=None, abort_event=None):
+        on_event("agent", "Critic")
+        for chunk in ("Your LDL is high. ", "Here is a long draft reply that gets finalized."):
+            on_event("stream", chunk)
+        widgets = [{"type": "Workout plan", "data": {"goal": "Cardio"}}]
+        return "Your LDL is high.\n\n**Nutrition**", session_id or "sess-1", widgets, ["User input: hi"]
+
+
+def _events(response):
+    return [
+        json.loads(frame[len("data: "):])
+        for frame in response.get_data(as_text=True).split("\n\n")
+        if frame.startswith("data: ")
+    ]
+
+
+def test_chat_streams_orchestrator_events_in_order_and_coalesces_text(monkeypatch):
+    monkeypatch.setattr(web_app, "orchestrator", FakeOrchestrator())
+    response = web_app.app.test_client().post("/api/chat", json={"message": "hi"})
+
+    assert response.mimetype == "text/event-stream"
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["X-Accel-Buffering"] == "no"
+    events = _events(response)
+    assert [e["type"] for e in events] == [
+        "agent", "stream", "final", "widget", "trace", "done",
+    ]
+    assert events[1]["content"] == "Your LDL is high. Here is a long draft reply that gets finalized."
+    # The finalized reply is always sent, even after a long streamed draft
+    assert events[2] == {"type": "final", "content": "Your LDL is high.\n\n**Nutrition**", "session_id": "sess-1"}
+
+
+def test_chat_rejects_missing_or_malformed_body():
+    client = web_app.app.test_client()
+    assert client.post("/api/chat", data="not json", content_type="application/json").status_code == 400
+    assert client.post("/api/chat", json={}).status_code == 400
+
+
+def test_chat_answers_other_methods_with_405():
+    client = web_app.app.test_client()
+    for method in (client.get, client.put, client.delete):
+        response = method("/api/chat")
+        assert response.status_code == 405
+        assert response.headers["Allow"] == "POST"
+
+
+def test_closing_the_stream_aborts_the_mesh_run(monkeypatch):
+    started, seen_abort = threading.Event(), threading.Event()
+
+    class SlowOrchestrator:
+        def run_mesh(self, user_input, session_id=None, on_event=None, abort_event=None):
+            on_event("agent", "Physician")
+            started.set()
+            if abort_event.wait(timeout=5):
+                seen_abort.set()
+            return "", "sess-1", [], []
+
+    monkeypatch.setattr(web_app, "orchestrator", SlowOrchestrator())
+    stream = web_app.stream_mesh("hi", None)
+    assert json.loads(next(stream)[len(b"data: "):])["type"] == "agent"
+    assert started.wait(timeout=5)
+
+    stream.close()
+    assert seen_abort.wait(timeout=5)
+
+
+def test_index_revalidates_with_etag():
+    client = web_app.app.test_client()
+    first = client.get("/")
+    assert first.status_code == 200 and first.data
+
+    again = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_index_links_versioned_assets_that_cache_long():
+    client = web_app.app.test_client()
+    html = client.get("/").get_data(as_text=True)
+    assert 'src="app.js?v=' in html and 'href="style.css?v=' in html
+
+    versioned = client.get("/app.js?v=abc123")
+    assert "max-age=31536000" in versioned.headers["Cache-Control"]
+    versioned.close()
+
+    plain = client.get("/app.js")
+    assert "max-age=31536000" not in plain.headers.get("Cache-Control", "")
+    plain.close()
+
+
+def test_chat_refuses_oversized_messages():
+    client = web_app.app.test_client()
+    too_long = {"message": "x" * (web_app.MAX_MESSAGE_CHARS + 1)}
+    assert client.post("/api/chat", json=too_long).status_code == 413
+    assert client.post("/api/chat", json={"message": "x" * 100_000}).status_code == 413
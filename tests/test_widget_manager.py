@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from agent_system.widget_manager import WidgetManager  # noqa: E402
+
+
+def _write_widget(directory, name, template):
+    (directory / f"{name}.widget").write_text(json.dumps({"name": name, "template": template}))
+
+
+def test_structural_template_survives_quotes_in_data(tmp_path):
+    _write_widget(tmp_path, "Card", '{"title": "{{ title }}", "tags": ["a", "{{ tag }}"]}')
+    manager = WidgetManager(str(tmp_path))
+
+    rendered = manager.render_widget("Card", {"title": 'Say "hi"', "tag": "b"})
+    assert rendered["data"] == {"title": 'Say "hi"', "tags": ["a", "b"]}
+
+
+def test_non_json_template_falls_back_to_text_render(tmp_path):
+    _write_widget(tmp_path, "Count", '{"n": {{ items|length }}}')
+    manager = WidgetManager(str(tmp_path))
+
+    assert manager.render_widget("Count", {"items": [1, 2, 3]})["data"] == {"n": 3}
+    assert manager.render_widget("Missing", {}) is None
+
+
+def test_reload_if_changed_reparses_only_edited_files(tmp_path):
+    _write_widget(tmp_path, "Card", '{"title": "{{ title }}"}')
+    _write_widget(tmp_path, "Other", '{"x": "static"}')
+    manager = WidgetManager(str(tmp_path))
+    other_def = manager._templates["Other"]
+    assert manager.reload_if_changed() is False
+
+    card_file = tmp_path / "Card.widget"
+    card_file.write_text(json.dumps({"name": "Card", "template": '{"heading": "{{ title }}"}'}))
+    stat = card_file.stat()
+    os.utime(card_file, (stat.st_atime, stat.st_mtime + 10))
+
+    assert manager.reload_if_changed() is True
+    assert manager.render_widget("Card", {"title": "t"})["data"] == {"heading": "t"}
+    assert manager._templates["Other"] is other_def
+
+    (tmp_path / "Other.widget").unlink()
+    assert manager.reload_if_changed() is True
+    assert "Other" not in manager.get_available_widgets()
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+os.environ.setdefault("GOOGLE_API_KEY", "test-key")
+
+from agent_system.tools.widget_tools import WidgetToolset  # noqa: E402
+from agent_system.widget_helper import WidgetHelper  # noqa: E402
+
+
+def _write_workouts(path, name):
+    path.write_text(json.dumps([{"id": "w1", "name": name, "difficulty": "Beginner"}]))
+
+
+def test_execute_memoizes_until_data_file_changes(tmp_path):
+    helper = WidgetHelper()
+    helper.data_dir = tmp_path
+    helper._stat_interval_ns = 0
+    workouts_file = tmp_path / "workouts.json"
+    _write_workouts(workouts_file, "Cardio Blast")
+    toolset = WidgetToolset(helper)
+
+    first = toolset.execute("return_workout_widget", {"goal": "cardio"})
+    second = toolset.execute("return_workout_widget", {"goal": "cardio"})
+    assert second["widget"] is first["widget"]
+    assert second["duration_ms"] == 0
+
+    _write_workouts(workouts_file, "Cardio Reloaded")
+    stat = workouts_file.stat()
+    os.utime(workouts_file, (stat.st_atime, stat.st_mtime + 10))
+
+    third = toolset.execute("return_workout_widget", {"goal": "cardio"})
+    assert third["widget"]["data"]["title"] == "Cardio Reloaded"
+
+
+def test_signature_ignores_arg_order():
+    toolset = WidgetToolset()
+    assert toolset.get_signature("t", {"a": 1, "b": [1, 2]}) == toolset.get_signature("t", {"b": [1, 2], "a": 1})
+
+
+def test_meal_plan_prefers_exact_id_over_substring_match(tmp_path):
+    helper = WidgetHelper()
+    helper.data_dir = tmp_path
+    (tmp_path / "meals.json").write_text(json.dumps([
+        {"id": "energy-boost", "name": "Energy Boost", "meals": []},
+        {"id": "energy", "name": "Steady Energy", "meals": []},
+    ]))
+
+    assert helper.get_meal_plan_widget("Energy")["data"]["title"] == "Steady Energy"
+    assert helper.get_meal_plan_widget("boost")["data"]["title"] == "Energy Boost"
@@ -1,169 +1,262 @@
-from flask import Flask, render_template, request, Response, jsonify
+from flask import Flask, abort, render_template, request, Response, jsonify
 from flask_cors import CORS
-import json
+import hashlib
 import sys
-import io
-from contextlib import redirect_stdout
-from agent_system.orchestration import Orchestrator
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from agent_system.orchestration import Orchestrator, ORCH_WORKERS
+import json_utils
+import logging
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = Flask(__name__, static_folder='static', static_url_path='')
+# Orchestrator tracing is logged at DEBUG; set MESH_DEBUG=1 to see it
+logging.basicConfig(level=logging.WARNING)
+if os.environ.get("MESH_DEBUG"):
+    logging.getLogger("agent_system").setLevel(logging.DEBUG)
+
+# Content-versioned asset URLs (see _versioned_assets) never change meaning
+VERSIONED_ASSET_MAX_AGE_S = 31536000
+
+class _App(Flask):
+    def get_send_file_max_age(self, filename):
+        # Only ?v=<hash> URLs may be kept for a year; plain URLs keep Flask's
+        # default of revalidating against the ETag/Last-Modified
+        if request.args.get('v'):
+            return VERSIONED_ASSET_MAX_AGE_S
+        return super().get_send_file_max_age(filename)
+
+app = _App(__name__, static_folder='static', static_url_path='')
+# Chat bodies are a message and a session id; anything bigger is refused unread
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024
 CORS(app)
 
+MAX_MESSAGE_CHARS = 8000
+
+# Idle SSE connections get a comment frame this often so proxies keep them open
+KEEPALIVE_INTERVAL_S = 15
+# Stream chunks arriving within this window are sent as one frame
+STREAM_COALESCE_S = 0.02
+
+def _frame(payload) -> bytes:
+    """Encode one SSE data frame."""
+    return b"data: " + json_utils.dumps(payload, default=str) + b"\n\n"
+
+# Keep caches and proxies (nginx buffers by default) from holding frames back
+_SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+    'Content-Encoding': 'identity',
+}
+
+# Constant frames are encoded once
+KEEPALIVE = b": keepalive\n\n"
+DONE = _frame({'type': 'done'})
+
 # Initialize orchestrator
 orchestrator = None
+_orchestrator_lock = threading.Lock()
 
 def get_orchestrator():
     global orchestrator
-    if orchestrator is None:
-        orchestrator = Orchestrator()
-    return orchestrator
+    # Lock-free once built; the lock stops concurrent first requests building two
+    orch = orchestrator
+    if orch is not None:
+        return orch
+    with _orchestrator_lock:
+        if orchestrator is None:
+            orchestrator = Orchestrator()
+        return orchestrator
+
+# Mesh runs share a bounded pool of warm threads rather than one new thread
+# per request; ORCH_WORKERS should match what the model provider will accept
+# concurrently, and the orchestrator sizes its agent pool from the same value
+_mesh_executor = ThreadPoolExecutor(
+    max_workers=ORCH_WORKERS,
+    thread_name_prefix="mesh",
+)
+
+def _versioned_assets(html: bytes) -> bytes:
+    """Rewrite local asset references to carry a content hash, e.g. app.js?v=1a2b..."""
+    for name in ('style.css', 'app.js'):
+        with open(os.path.join(app.static_folder, name), 'rb') as f:
+            version = hashlib.sha1(f.read()).hexdigest()[:12]
+        html = html.replace(f'"{name}"'.encode(), f'"{name}?v={version}"'.encode())
+    return html
+
+# The landing page never changes while the server runs; read it once and let
+# browsers revalidate against its ETag instead of re-downloading it
+with open(os.path.join(app.static_folder, 'index.html'), 'rb') as f:
+    _INDEX_HTML = _versioned_assets(f.read())
+_INDEX_ETAG = hashlib.sha1(_INDEX_HTML).hexdigest()
 
 @app.route('/')
 def index():
-    return app.send_static_file('index.html')
+    response = Response(_INDEX_HTML, mimetype='text/html')
+    response.set_etag(_INDEX_ETAG)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
-@app.route('/api/chat', methods=['GET', 'POST'])
-def chat():
-    if request.method == 'GET':
-        user_message = request.args.get('message', '')
-        session_id = request.args.get('session_id', None)
-    else:
-        data = request.json
-        user_message = data.get('message', '')
-        session_id = data.get('session_id', None)
+class NotifiableDeque:
+    """deque + Event: producers append and signal, the consumer drains everything queued.
     
-    if not user_message:
-        return jsonify({'error': 'No message provided'}), 400
+    Cheaper than queue.Queue, which takes a lock and a Condition on every put/get.
+    """
     
-    def generate():
-        """Stream agent activity and responses via Server-Sent Events"""
-        import queue
-        import threading
-        
-        output_queue = queue.Queue()
-        
-        def run_orchestrator():
-            """Run orchestrator in separate thread and capture output"""
-            try:
-                # Capture stdout
-                import sys
-                from io import StringIO
-                
-                # Create custom stdout that writes to queue
-                class QueueWriter:
-                    def write(self, text):
-                        if text.strip():
-                            output_queue.put(('output', text))
-                        sys.__stdout__.write(text)  # Also write to console
-                    
-                    def flush(self):
-                        sys.__stdout__.flush()
-                
-                old_stdout = sys.stdout
-                sys.stdout = QueueWriter()
-                
-                try:
-                    response, new_session_id, widgets, trace = get_orchestrator().run_mesh(user_message, session_id)
-                    output_queue.put(('final', {'response': response, 'session_id': new_session_id, 'widgets': widgets, 'trace': trace}))
-                except Exception as e:
-                    output_queue.put(('error', str(e)))
-                finally:
-                    sys.stdout = old_stdout
-                    output_queue.put(('done', None))
-                    
-            except Exception as e:
-                output_queue.put(('error', str(e)))
-                output_queue.put(('done', None))
-        
-        # Start orchestrator in background thread
-        thread = threading.Thread(target=run_orchestrator)
-        thread.start()
-        
-        current_agent = None
-        message_buffer = ""
-        
-        # Stream output from queue
-        while True:
-            try:
-                msg_type, content = output_queue.get(timeout=0.1)
+    def __init__(self):
+        self._items = deque()
+        self._ready = threading.Event()
+    
+    def put(self, item):
+        self._items.append(item)
+        self._ready.set()
+    
+    def wait(self, timeout=None) -> bool:
+        """Block until something may be queued; False if the timeout expired."""
+        return self._ready.wait(timeout)
+    
+    def drain(self):
+        """Yield every queued item. Clears the signal first so no wakeup is lost."""
+        self._ready.clear()
+        items = self._items
+        while items:
+            yield items.popleft()
+
+def run_orchestrator(user_message, session_id, output_queue, abort_event):
+    """Run the mesh for one request, forwarding its events into output_queue."""
+    def on_event(event_type, payload):
+        output_queue.put((event_type, payload))
+    
+    try:
+        # The client may have left while this run waited for a worker
+        if abort_event.is_set():
+            return
+        response, new_session_id, widgets, trace = get_orchestrator().run_mesh(
+            user_message, session_id, on_event=on_event, abort_event=abort_event
+        )
+        output_queue.put(('final', {'response': response, 'session_id': new_session_id, 'widgets': widgets, 'trace': trace}))
+    except Exception as e:
+        output_queue.put(('error', str(e)))
+    finally:
+        output_queue.put(('done', None))
+
+def stream_mesh(user_message, session_id):
+    """Stream agent activity and responses via Server-Sent Events"""
+    output_queue = NotifiableDeque()
+    # Set if the client disconnects so the mesh stops spending LLM calls on it
+    abort_event = threading.Event()
+    
+    # Run the mesh on the shared pool; it always finishes by queueing 'done'
+    _mesh_executor.submit(run_orchestrator, user_message, session_id, output_queue, abort_event)
+    
+    # Stream chunks held back until the coalescing deadline
+    pending = []
+    deadline = 0.0
+    
+    def take_stream_frame():
+        text = "".join(pending)
+        pending.clear()
+        return _frame({'type': 'stream', 'content': text})
+    
+    # Stream output from queue, handling everything queued per wakeup
+    finished = False
+    try:
+        while not finished:
+            if pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not output_queue.wait(timeout=remaining):
+                    yield take_stream_frame()
+                    continue
+            # Block until the mesh produces output; only a genuinely idle stream times out
+            elif not output_queue.wait(timeout=KEEPALIVE_INTERVAL_S):
+                yield KEEPALIVE
+                continue
+            
+            out = []
+            for msg_type, content in output_queue.drain():
+                if msg_type == 'stream':
+                    if not pending:
+                        deadline = time.monotonic() + STREAM_COALESCE_S
+                    pending.append(content)
+                    continue
+                # Anything else goes out immediately, after the text that preceded it
+                if pending:
+                    out.append(take_stream_frame())
                 
-                if msg_type == 'output':
-                    # Parse output for agent activity
-                    stripped = content.strip()
-                    if stripped.startswith("FOCUS_TRANSITION::"):
-                        transition = stripped.split("FOCUS_TRANSITION::", 1)[1]
-                        parts = transition.split("->")
-                        previous_focus = parts[0].strip() if len(parts) > 0 else "none"
-                        new_focus = parts[1].strip() if len(parts) > 1 else ""
-                        payload = {
-                            'type': 'status',
-                            'focus': new_focus,
-                            'previous': None if previous_focus == 'none' else previous_focus
-                        }
-                        yield f"data: {json.dumps(payload)}\n\n"
-                        continue
-                    if '--- Agent Active:' in content:
-                        agent_name = content.split('--- Agent Active:')[1].strip().replace('---', '').strip()
-                        current_agent = agent_name
-                        yield f"data: {json.dumps({'type': 'agent', 'name': agent_name})}\n\n"
-                    
-                    elif '📤' in content and current_agent:
-                        # Streaming text to client (marked with 📤)
-                        text = content.replace('📤', '').strip()
-                        if text and text != '(function call)':
-                            message_buffer += text
-                            yield f"data: {json.dumps({'type': 'stream', 'content': text})}\n\n"
-                    
-                    elif '💬' in content and current_agent:
-                        # Legacy fallback
-                        text = content.replace('💬', '').strip()
-                        if text and text != '(function call)':
-                            message_buffer += text
-                            yield f"data: {json.dumps({'type': 'stream', 'content': text})}\n\n"
+                if msg_type == 'agent':
+                    out.append(_frame({'type': 'agent', 'name': content}))
                 
                 elif msg_type == 'final':
                     # Send final response first (ensures narrative precedes widgets)
                     response_text = content['response'] if isinstance(content, dict) else content
                     new_session_id = content['session_id'] if isinstance(content, dict) else None
                     
-                    if not message_buffer or len(message_buffer) < 50:
-                        yield f"data: {json.dumps({'type': 'final', 'content': response_text, 'session_id': new_session_id})}\n\n"
-                    else:
-                        yield f"data: {json.dumps({'type': 'session', 'session_id': new_session_id})}\n\n"
+                    # Always send the finalized reply; it replaces the streamed draft
+                    out.append(_frame({'type': 'final', 'content': response_text, 'session_id': new_session_id}))
                     
                     # Stream widgets after text
                     if isinstance(content, dict) and 'widgets' in content:
                         for widget in content['widgets']:
                             widget_type = widget.get('type', 'unknown')
                             print(f"  🧩 Streaming widget to client: {widget_type}")
-                            yield f"data: {json.dumps({'type': 'widget', 'widget': widget_type, 'data': widget['data']})}\n\n"
+                            out.append(_frame({'type': 'widget', 'widget': widget_type, 'data': widget['data']}))
                     if isinstance(content, dict) and 'trace' in content:
-                        yield f"data: {json.dumps({'type': 'trace', 'entries': content['trace']})}\n\n"
+                        out.append(_frame({'type': 'trace', 'entries': content['trace']}))
                     
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    out.append(DONE)
+                    finished = True
                     break
                 
                 elif msg_type == 'error':
-                    yield f"data: {json.dumps({'type': 'error', 'message': content})}\n\n"
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    out.append(_frame({'type': 'error', 'message': content}))
+                    out.append(DONE)
+                    finished = True
                     break
                 
                 elif msg_type == 'done':
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    out.append(DONE)
+                    finished = True
                     break
-                    
-            except queue.Empty:
-                # Keep connection alive
-                yield f": keepalive\n\n"
-                continue
-        
-        thread.join(timeout=1)
+            
+            # One write per wakeup, however many events it carried
+            if out:
+                yield b"".join(out)
+    finally:
+        # A disconnect closes this generator mid-stream (GeneratorExit at a yield)
+        if not finished:
+            abort_event.set()
+
+def _read_json_body() -> dict:
+    """Parse the request body as a JSON object; {} if it is missing or malformed."""
+    raw = request.get_data(cache=False)
+    try:
+        data = json_utils.loads(raw)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+@app.route('/api/chat', methods=['POST'])
+def chat():
+    data = _read_json_body()
+    user_message = data.get('message', '')
+    session_id = data.get('session_id', None)
+    
+    if not user_message or not isinstance(user_message, str):
+        return jsonify({'error': 'No message provided'}), 400
+    if len(user_message) > MAX_MESSAGE_CHARS:
+        return jsonify({'error': 'Message too long'}), 413
     
-    return Response(generate(), mimetype='text/event-stream')
+    return Response(stream_mesh(user_message, session_id), mimetype='text/event-stream', headers=_SSE_HEADERS)
+
+# Static files are served from the root, so without this rule a GET to the chat
+# endpoint falls through to the static route and 404s instead of a 405
+@app.route('/api/chat', methods=['GET', 'PUT', 'PATCH', 'DELETE'])
+def chat_wrong_method():
+    abort(405, valid_methods=['POST'])
 
 if __name__ == '__main__':
     if not os.environ.get("GOOGLE_API_KEY"):
@@ -177,4 +270,11 @@ if __name__ == '__main__':
     print(f"\n📱 Open your browser to: http://localhost:5000")
     print("\n💡 Press Ctrl+C to stop the server\n")
     
-    app.run(debug=True, port=5000, threaded=True)
+    # Debugger and reloader only on request; both cost time on every request
+    debug = os.environ.get("FLASK_DEBUG") == "1"
+    # Build the mesh before serving so the first request doesn't pay for it.
+    # Under the reloader only the serving child process needs one.
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        get_orchestrator()
+    
+    app.run(debug=debug, port=5000, threaded=True)